@@ -19,8 +19,17 @@ from .. import tools as _tools
 from ..tools import group as _rbobjs
 
 import numpy as _np
-import copy as _copy
 import itertools as _itertools
+import functools as _functools
+
+
+@_functools.lru_cache(maxsize=None)
+def _gate_label(name, qubits):
+    """
+    Returns `Label(name, qubits)`, for a tuple `qubits`. Labels are immutable, and the samplers
+    build the same few gate labels over and over, so these are cached and shared.
+    """
+    return _lbl.Label(name, qubits)
 
 
 def find_all_sets_of_compatible_twoQgates(edgelist, n, gatename='Gcnot', aslabel=False):
@@ -30,26 +39,44 @@ def find_all_sets_of_compatible_twoQgates(edgelist, n, gatename='Gcnot', aslabel
     n : int . the number of two-qubit gates to have in the set.
 
     """
-    co2Qgates = []
-
-    # Go for all combinations of n two-qubit gates from the edgelist.
-    for npairs in _itertools.combinations(edgelist, n):
-
-        # Make a list of the qubits involved in the gates
-        flat_list = [item for sublist in npairs for item in sublist]
-
-        # If no qubit is involved in more than one gate we accept the combination
-        if len(flat_list) == len(set(flat_list)):
-            if aslabel:
-                co2Qgates.append([_lbl.Label(gatename, pair) for pair in npairs])
-            else:
-                co2Qgates.append([gatename + ':' + pair[0] + ':' + pair[1] for pair in npairs])
+    # Give each qubit a bit, so that the qubits acted on by a set of gates is an int and two gates are
+    # compatible if their masks don't overlap. Gates that act on the same qubit twice are never compatible.
+    qubit_bits = {}
+    pairs = []
+    masks = []
+    for pair in edgelist:
+        mask = 0
+        for q in pair:
+            mask |= qubit_bits.setdefault(q, 1 << len(qubit_bits))
+        if bin(mask).count('1') == len(pair):
+            pairs.append(pair)
+            masks.append(mask)
+
+    # Build the sets by a depth-first search over the edges in order, only extending a partial set by gates
+    # that are compatible with it. This gives the compatible sets in the same order as the n-combinations of
+    # `edgelist`, without generating all those combinations.
+    npairs_list = []
+
+    def extend(npairs, usedmask, start):
+        if len(npairs) == n:
+            npairs_list.append(npairs)
+            return
+        for i in range(start, len(pairs) - (n - len(npairs) - 1)):
+            if usedmask & masks[i] == 0:
+                extend(npairs + [pairs[i]], usedmask | masks[i], i + 1)
+
+    extend([], 0, 0)
+
+    if aslabel:
+        co2Qgates = [[_gate_label(gatename, tuple(pair)) for pair in npairs] for npairs in npairs_list]
+    else:
+        co2Qgates = [[gatename + ':' + pair[0] + ':' + pair[1] for pair in npairs] for npairs in npairs_list]
 
     return co2Qgates
 
 
 def circuit_layer_by_pairing_qubits(pspec, qubit_labels=None, twoQprob=0.5, oneQgatenames='all',
-                                    twoQgatenames='all', modelname='clifford'):
+                                    twoQgatenames='all', modelname='clifford', randState=None):
     """
     Samples a random circuit layer by pairing up qubits and picking a two-qubit gate for a pair
     with the specificed probability. This sampler *assumes* all-to-all connectivity, and does
@@ -95,12 +122,17 @@ def circuit_layer_by_pairing_qubits(pspec, qubit_labels=None, twoQprob=0.5, oneQ
         `pspec.models` to use to extract the gate-set. The `clifford` default is suitable
         for Clifford or direct RB, but will not use any non-Clifford gates in the gate-set.
 
+    randState : numpy.random.RandomState, optional
+        A RandomState object to generate samples from. If None, numpy's global random
+        state is used, so that `numpy.random.seed` makes the sampling reproducible.
+
     Returns
     -------
     list of Labels
         A list of gate Labels that defines a "complete" circuit layer (there is one and only
         one gate acting on each qubit in `pspec` or `qubit_labels`).
     """
+    rndm = _np.random if randState is None else randState
     if qubit_labels is None: n = pspec.number_of_qubits
     else:
         assert(isinstance(qubit_labels, list) or isinstance(qubit_labels, tuple)), "SubsetQs must be a list or a tuple!"
@@ -108,25 +140,11 @@ def circuit_layer_by_pairing_qubits(pspec, qubit_labels=None, twoQprob=0.5, oneQ
 
     # If the one qubit and/or two qubit gate names are only specified as 'all', construct them.
     if (oneQgatenames == 'all') or (twoQgatenames == 'all'):
+        gate_partition = pspec.get_gate_partition(modelname)
         if oneQgatenames == 'all':
-            oneQpopulate = True
-            oneQgatenames = []
-        else:
-            oneQpopulate = False
+            oneQgatenames = gate_partition['1Q_names']
         if twoQgatenames == 'all':
-            twoQpopulate = True
-            twoQgatenames = []
-        else:
-            twoQpopulate = False
-
-        operationlist = pspec.models[modelname].get_primitive_op_labels()
-        for gate in operationlist:
-            if oneQpopulate:
-                if (gate.number_of_qubits == 1) and (gate.name not in oneQgatenames):
-                    oneQgatenames.append(gate.name)
-            if twoQpopulate:
-                if (gate.number_of_qubits == 2) and (gate.name not in twoQgatenames):
-                    twoQgatenames.append(gate.name)
+            twoQgatenames = gate_partition['2Q_names']
 
     # Basic variables required for sampling the circuit layer.
     if qubit_labels is None:
@@ -137,44 +155,46 @@ def circuit_layer_by_pairing_qubits(pspec, qubit_labels=None, twoQprob=0.5, oneQ
     num_oneQgatenames = len(oneQgatenames)
     num_twoQgatenames = len(twoQgatenames)
 
-    # If there is an odd number of qubits, begin by picking one to have a 1-qubit gate.
+    # Draw all the random numbers for the layer at once: a uniformly random ordering of the qubits, which are
+    # paired up in this order, a coin flip for each pair, and the index of the gate to use in each gate slot.
+    order = rndm.permutation(n)
+    twoQgate_on_pair = rndm.random_sample(n // 2) < twoQprob
+    oneQgate_indices = rndm.randint(0, num_oneQgatenames, size=n) if num_oneQgatenames > 0 else None
+    twoQgate_indices = rndm.randint(0, num_twoQgatenames, size=n // 2) if num_twoQgatenames > 0 else None
+
+    # If there is an odd number of qubits, the last qubit in the ordering is not paired and gets a 1-qubit gate.
     if n % 2 != 0:
-        q = qubits[_np.random.randint(0, n)]
-        name = oneQgatenames[_np.random.randint(0, num_oneQgatenames)]
-        del qubits[q]  # XXX is this correct?
-        sampled_layer.append(_lbl.Label(name, q))
+        q = qubits[order[n - 1]]
+        name = oneQgatenames[oneQgate_indices[n - 1]]
+        sampled_layer.append(_gate_label(name, (q,)))
 
-    # Go through n//2 times until all qubits have been paired up and gates on them sampled
+    # Go through the n//2 pairs of qubits, and sample the gates on each pair.
     for i in range(n // 2):
 
-        # Pick two of the remaining qubits : each qubit that is picked is deleted from the list.
-        index = _np.random.randint(0, len(qubits))
-        q1 = qubits[index]
-        del qubits[index]
-        index = _np.random.randint(0, len(qubits))
-        q2 = qubits[index]
-        del qubits[index]
+        q1 = qubits[order[2 * i]]
+        q2 = qubits[order[2 * i + 1]]
 
-        # Flip a coin to decide whether to act a two-qubit gate on that qubit
-        if _np.random.binomial(1, twoQprob) == 1:
+        # Use the coin flip to decide whether to act a two-qubit gate on that qubit
+        if twoQgate_on_pair[i]:
             # If there is more than one two-qubit gate on the pair, pick a uniformly random one.
-            name = twoQgatenames[_np.random.randint(0, num_twoQgatenames)]
-            sampled_layer.append(_lbl.Label(name, (q1, q2)))
+            name = twoQgatenames[twoQgate_indices[i]]
+            sampled_layer.append(_gate_label(name, (q1, q2)))
         else:
             # Independently, pick uniformly random 1-qubit gates to apply to each qubit.
-            name1 = oneQgatenames[_np.random.randint(0, num_oneQgatenames)]
-            name2 = oneQgatenames[_np.random.randint(0, num_oneQgatenames)]
-            sampled_layer.append(_lbl.Label(name1, q1))
-            sampled_layer.append(_lbl.Label(name2, q2))
+            name1 = oneQgatenames[oneQgate_indices[2 * i]]
+            name2 = oneQgatenames[oneQgate_indices[2 * i + 1]]
+            sampled_layer.append(_gate_label(name1, (q1,)))
+            sampled_layer.append(_gate_label(name2, (q2,)))
 
     return sampled_layer
 
 
-def circuit_layer_by_edgegrab(pspec, qubit_labels=None, meantwoQgates=1, modelname='clifford'):
+def circuit_layer_by_edgegrab(pspec, qubit_labels=None, meantwoQgates=1, modelname='clifford', randState=None):
     """
     todo
 
     """
+    rndm = _np.random if randState is None else randState
     assert(modelname == 'clifford'), "This function currently assumes sampling from a Clifford model!"
     if qubit_labels is None:
         qubits = list(pspec.qubit_labels[:])  # copy this list
@@ -182,19 +202,26 @@ def circuit_layer_by_edgegrab(pspec, qubit_labels=None, meantwoQgates=1, modelna
         assert(isinstance(qubit_labels, (list, tuple))), "SubsetQs must be a list or a tuple!"
         qubits = list(qubit_labels[:])  # copy this list
 
-    # Prep the sampling variables.
-    sampled_layer = []
-    edgelist = pspec.qubitgraph.edges()
-    edgelist = [e for e in edgelist if all([q in qubits for q in e])]
+    # Prep the sampling variables. The edges are stored as an (E,2) array of qubit indices, so that the edges that
+    # are still available can be found with one array operation per selected edge.
+    qubit_indices = {q: i for i, q in enumerate(qubits)}
+    edgelist = [e for e in pspec.qubitgraph.edges() if e[0] in qubit_indices and e[1] in qubit_indices]
+    edges = _np.array([(qubit_indices[e[0]], qubit_indices[e[1]]) for e in edgelist], int).reshape(-1, 2)
+    used = _np.zeros(len(qubits), bool)
+    available = _np.ones(len(edgelist), bool)
     selectededges = []
 
-    # Go through until all qubits have been assigned a gate.
-    while len(edgelist) > 0:
+    # Go through until there are no edges left that don't contain an already selected qubit. At most
+    # n // 2 edges can be selected, so the uniform numbers that pick the edges are drawn up front.
+    edge_choices = rndm.random_sample(len(qubits) // 2)
+    while available.any():
 
-        edge = edgelist[_np.random.randint(0, len(edgelist))]
-        selectededges.append(edge)
-        # Delete all edges containing these qubits.
-        edgelist = [e for e in edgelist if not any([q in e for q in edge])]
+        available_indices = _np.flatnonzero(available)
+        ind = available_indices[int(edge_choices[len(selectededges)] * len(available_indices))]
+        selectededges.append(edgelist[ind])
+        # Remove all edges containing these qubits.
+        used[edges[ind]] = True
+        available = ~used[edges].any(axis=1)
 
     num2Qgates = len(selectededges)
     assert(num2Qgates >= meantwoQgates), "Device has insufficient connectivity!"
@@ -204,27 +231,25 @@ def circuit_layer_by_edgegrab(pspec, qubit_labels=None, meantwoQgates=1, modelna
     else:
         twoQprob = 0
 
-    unusedqubits = _copy.copy(qubits)
-    for edge in selectededges:
-        if bool(_np.random.binomial(1, twoQprob)):
+    # The two-qubit gates on the edges that are given a 2-qubit gate.
+    twoQgate_on_edge = rndm.random_sample(num2Qgates) < twoQprob
+    twoQedges = [edge for edge, twoQgate in zip(selectededges, twoQgate_on_edge) if twoQgate]
+    possibleops = [pspec.clifford_ops_on_qubits[edge] for edge in twoQedges]
+    #assert(all([len(ops) == 1 for ops in possibleops])), "Sampler assumes a single 2-qubit gate!"
+    usedqubits = set([q for edge in twoQedges for q in edge])
 
-            # The two-qubit gates on that edge.
-            possibleops = pspec.clifford_ops_on_qubits[edge]
-            #assert(len(possibleops) == 1), "Sampler assumes a single 2-qubit gate!"
-            sampled_layer.append(possibleops[_np.random.randint(0, len(possibleops))])
-            for q in edge:
-                del unusedqubits[unusedqubits.index(q)]
-
-    for q in unusedqubits:
-        possibleops = pspec.clifford_ops_on_qubits[(q,)]
-        gate = possibleops[_np.random.randint(0, len(possibleops))]
-        sampled_layer.append(gate)
+    # The 1-qubit gates on the other qubits. The gate on every qubit is sampled at once.
+    unusedqubits = [q for q in qubits if q not in usedqubits]
+    oneQgates_on_qubit = pspec.get_gate_partition('clifford')['1Q_by_qubit']
+    possibleops += [oneQgates_on_qubit[q] for q in unusedqubits]
+    indices = rndm.randint(0, _np.array([len(ops) for ops in possibleops], int))
+    sampled_layer = [ops[i] for i, ops in zip(indices, possibleops)]
 
     return sampled_layer
 
 
 def circuit_layer_by_Qelimination(pspec, qubit_labels=None, twoQprob=0.5, oneQgates='all',
-                                  twoQgates='all', modelname='clifford'):
+                                  twoQgates='all', modelname='clifford', randState=None):
     """
     Samples a random circuit layer by eliminating qubits one by one. This sampler works
     with any connectivity, but the expected number of 2-qubit gates in a layer depends
@@ -276,136 +301,93 @@ def circuit_layer_by_Qelimination(pspec, qubit_labels=None, twoQprob=0.5, oneQga
         `pspec.models` to use to extract the model. The `clifford` default is suitable
         for Clifford or direct RB, but will not use any non-Clifford gates in the model.
 
+    randState : numpy.random.RandomState, optional
+        A RandomState object to generate samples from. If None, numpy's global random
+        state is used, so that `numpy.random.seed` makes the sampling reproducible.
+
     Returns
     -------
     list of gates
         A list of gate Labels that defines a "complete" circuit layer (there is one and
         only one gate acting on each qubit in `pspec` or `qubit_labels`).
     """
+    rndm = _np.random if randState is None else randState
     if qubit_labels is None:
-        n = pspec.number_of_qubits
         qubits = list(pspec.qubit_labels[:])  # copy this list
     else:
         assert(isinstance(qubit_labels, (list, tuple))), "SubsetQs must be a list or a tuple!"
-        n = len(qubit_labels)
         qubits = list(qubit_labels[:])  # copy this list
+    n = len(qubits)
 
-    # If oneQgates is specified, use the given list.
-    if oneQgates != 'all':
-        oneQgates_available = _copy.copy(oneQgates)
-    # If oneQgates is not specified, extract this list from the ProcessorSpec
+    # Index the gates by the qubits they act on, so that each step of the sampling only has to look
+    # at the gates on the qubit it has picked. If oneQgates or twoQgates is not specified, this index
+    # is extracted from the ProcessorSpec.
+    if oneQgates == 'all' or twoQgates == 'all':
+        gate_partition = pspec.get_gate_partition(modelname)
+    if oneQgates == 'all':
+        oneQgates_on_qubit = gate_partition['1Q_by_qubit']
     else:
-        oneQgates_available = list(pspec.models[modelname].get_primitive_op_labels())
-        d = len(oneQgates_available)
-        for i in range(0, d):
-            # If it's not a 1-qubit gate, we delete it.
-            if oneQgates_available[d - 1 - i].number_of_qubits != 1:
-                del oneQgates_available[d - 1 - i]
-            # If it's not a gate on the allowed qubits, we delete it.
-            elif oneQgates_available[d - 1 - i].qubits[0] not in qubits:
-                del oneQgates_available[d - 1 - i]
-
-    # If twoQgates is specified, use the given list.
-    if twoQgates != 'all':
-        twoQgates_available = _copy.copy(twoQgates)
-    # If twoQgates is not specified, extract this list from the ProcessorSpec
+        oneQgates_on_qubit = {q: [] for q in qubits}
+        for gate in oneQgates:
+            if gate.qubits[0] in oneQgates_on_qubit:
+                oneQgates_on_qubit[gate.qubits[0]].append(gate)
+    if twoQgates == 'all':
+        twoQgates_on_qubit = gate_partition['2Q_by_qubit']
     else:
-        twoQgates_available = list(pspec.models[modelname].get_primitive_op_labels())
-        d = len(twoQgates_available)
-        for i in range(0, d):
-            # If it's not a 2-qubit gate, we delete it.
-            if twoQgates_available[d - 1 - i].number_of_qubits != 2:
-                del twoQgates_available[d - 1 - i]
-            # If it's not a gate on the allowed qubits, we delete it.
-            elif not set(twoQgates_available[d - 1 - i].qubits).issubset(set(qubits)):
-                del twoQgates_available[d - 1 - i]
-
-    # If the `twoQprob` is not None, we specify a weighting towards 2-qubit gates
-    if twoQprob is not None:
-        weighting = [1 - twoQprob, twoQprob]
-
-    # Prep the sampling variables.
+        twoQgates_on_qubit = {q: [] for q in qubits}
+        for gate in twoQgates:
+            q0, q1 = gate.qubits
+            if q0 in twoQgates_on_qubit and q1 in twoQgates_on_qubit:
+                twoQgates_on_qubit[q0].append(gate)
+                twoQgates_on_qubit[q1].append(gate)
+
+    # Visiting the qubits in a uniformly random order is the same as repeatedly picking one
+    # uniformly at random from those that have not yet been assigned a gate. All the random
+    # numbers are drawn up front: for each qubit, a coin to choose between a 1-qubit and a
+    # 2-qubit gate and a uniform number that picks the gate from the list of candidates.
+    order = rndm.permutation(n)
+    coins = rndm.random_sample(n)
+    gate_choices = rndm.random_sample(n)
+    remaining_qubits = set(qubits)
     sampled_layer = []
-    remaining_qubits = _copy.deepcopy(qubits)
-    num_qubits_used = 0
-
-    # Go through until all qubits have been assigned a gate.
-    while num_qubits_used < n:
-
-        # Pick a random qubit
-        r = _np.random.randint(0, n - num_qubits_used)
-        q = remaining_qubits[r]
-        del remaining_qubits[r]
 
-        # Find the 1Q gates that act on q.
-        oneQgates_remaining_on_q = []
-        ll = len(oneQgates_available)
-        for i in range(0, ll):
-            if q in oneQgates_available[ll - 1 - i].qubits:
-                oneQgates_remaining_on_q.append(oneQgates_available[ll - 1 - i])
-                del oneQgates_available[ll - 1 - i]
+    for i, coin, gate_choice in zip(order, coins, gate_choices):
+        q = qubits[i]
+        # Skip qubits that have already been assigned a 2-qubit gate.
+        if q not in remaining_qubits:
+            continue
 
         # Find the 2Q gates that act on q and a remaining qubit.
-        twoQgates_remaining_on_q = []
-        ll = len(twoQgates_available)
-        for i in range(0, ll):
-            if q in twoQgates_available[ll - 1 - i].qubits:
-                twoQgates_remaining_on_q.append(twoQgates_available[ll - 1 - i])
-                del twoQgates_available[ll - 1 - i]
-
-        # If twoQprob is None, there is no weighting towards 2-qubit gates.
-        if twoQprob is None:
-            nrm = len(oneQgates_remaining_on_q) + len(twoQgates_remaining_on_q)
-            weighting = [len(oneQgates_remaining_on_q) / nrm, len(twoQgates_remaining_on_q) / nrm]
-
-        # Decide whether to to implement a 2-qubit gate or a 1-qubit gate.
+        twoQgates_remaining_on_q = [gate for gate in twoQgates_on_qubit.get(q, ())
+                                    if gate.qubits[0] in remaining_qubits and gate.qubits[1] in remaining_qubits]
+        remaining_qubits.remove(q)
+
+        # Decide whether to to implement a 2-qubit gate or a 1-qubit gate. If twoQprob is None,
+        # there is no weighting towards 2-qubit gates.
         if len(twoQgates_remaining_on_q) == 0:
-            xx = 1
+            use_twoQgate = False
+        elif twoQprob is None:
+            nrm = len(oneQgates_on_qubit.get(q, ())) + len(twoQgates_remaining_on_q)
+            use_twoQgate = coin < len(twoQgates_remaining_on_q) / nrm
         else:
-            xx = _np.random.choice([1, 2], p=weighting)
+            use_twoQgate = coin < twoQprob
+
+        # Implement a 2-qubit gate on qubit q, and remove the other qubit it acts on.
+        if use_twoQgate:
+            gate = twoQgates_remaining_on_q[int(gate_choice * len(twoQgates_remaining_on_q))]
+            sampled_layer.append(gate)
+            remaining_qubits.remove(gate.qubits[1] if gate.qubits[0] == q else gate.qubits[0])
 
         # Implement a 1-qubit gate on qubit q.
-        if xx == 1:
-            # Sample the gate
-            r = _np.random.randint(0, len(oneQgates_remaining_on_q))
-            sampled_layer.append(oneQgates_remaining_on_q[r])
-            # We have assigned gates to 1 of the remaining qubits.
-            num_qubits_used += 1
-
-        # Implement a 2-qubit gate on qubit q.
-        if xx == 2:
-            # Sample the gate
-            r = _np.random.randint(0, len(twoQgates_remaining_on_q))
-            sampled_layer.append(twoQgates_remaining_on_q[r])
-
-            # Find the label of the other qubit in the sampled gate.
-            other_qubit = twoQgates_remaining_on_q[r].qubits[0]
-            if other_qubit == q:
-                other_qubit = twoQgates_remaining_on_q[r].qubits[1]
-
-            # Delete the gates on this other qubit from the 1-qubit gate list.
-            ll = len(oneQgates_available)
-            for i in range(0, ll):
-                if other_qubit in oneQgates_available[ll - 1 - i].qubits:
-                    del oneQgates_available[ll - 1 - i]
-
-            # Delete the gates on this other qubit from the 2-qubit gate list.
-            ll = len(twoQgates_available)
-            for i in range(0, ll):
-                if other_qubit in twoQgates_available[ll - 1 - i].qubits:
-                    del twoQgates_available[ll - 1 - i]
-
-            # Delete this other qubit from remaining qubits list.
-            del remaining_qubits[remaining_qubits.index(other_qubit)]
-
-            # We have assigned gates to 2 of the remaining qubits.
-            num_qubits_used += 2
+        else:
+            oneQgates_on_q = oneQgates_on_qubit.get(q, ())
+            sampled_layer.append(oneQgates_on_q[int(gate_choice * len(oneQgates_on_q))])
 
     return sampled_layer
 
 
 def circuit_layer_by_co2Qgates(pspec, qubit_labels, co2Qgates, co2Qgatesprob='uniform', twoQprob=1.0,
-                               oneQgatenames='all', modelname='clifford'):
+                               oneQgatenames='all', modelname='clifford', randState=None):
     """
     Samples a random circuit layer using the specified list of "compatible two-qubit gates"
     (co2Qgates). That is, the user inputs a list (`co2Qgates`) specifying 2-qubit gates that are
@@ -491,28 +473,35 @@ def circuit_layer_by_co2Qgates(pspec, qubit_labels, co2Qgates, co2Qgatesprob='un
         extract the model. The `clifford` default is suitable for Clifford or direct RB,
         but will not use any non-Clifford gates in the model.
 
+    randState : numpy.random.RandomState, optional
+        A RandomState object to generate samples from. If None, numpy's global random
+        state is used, so that `numpy.random.seed` makes the sampling reproducible.
+
     Returns
     -------
     list of gates
         A list of gate Labels that defines a "complete" circuit layer (there is one and
         only one gate acting on each qubit).
     """
+    rndm = _np.random if randState is None else randState
     assert(modelname == 'clifford'), "This function currently assumes sampling from a Clifford model!"
     # Pick the sector.
     if isinstance(co2Qgatesprob, str):
         assert(co2Qgatesprob == 'uniform'), "If `co2Qgatesprob` is a string it must be 'uniform!'"
-        twoqubitgates_or_nestedco2Qgates = co2Qgates[_np.random.randint(0, len(co2Qgates))]
+        twoqubitgates_or_nestedco2Qgates = co2Qgates[rndm.randint(0, len(co2Qgates))]
     else:
-        co2Qgatesprob = _np.array(co2Qgatesprob) / _np.sum(co2Qgatesprob)
-        x = list(_np.random.multinomial(1, co2Qgatesprob))
-        twoqubitgates_or_nestedco2Qgates = co2Qgates[x.index(1)]
+        # Inverse-transform sampling: the first sector whose cumulative probability exceeds a uniform random number.
+        cumprobs = _np.cumsum(co2Qgatesprob, dtype=float)
+        cumprobs /= cumprobs[-1]
+        sector = _np.searchsorted(cumprobs, rndm.random_sample(), side='right')
+        twoqubitgates_or_nestedco2Qgates = co2Qgates[sector]
 
     # The special case where the selected co2Qgates contains no gates or co2Qgates.
     if len(twoqubitgates_or_nestedco2Qgates) == 0:
         twoqubitgates = twoqubitgates_or_nestedco2Qgates
     # If it's a nested sector, sample uniformly from the nested co2Qgates.
     elif type(twoqubitgates_or_nestedco2Qgates[0]) == list:
-        twoqubitgates = twoqubitgates_or_nestedco2Qgates[_np.random.randint(0, len(twoqubitgates_or_nestedco2Qgates))]
+        twoqubitgates = twoqubitgates_or_nestedco2Qgates[rndm.randint(0, len(twoqubitgates_or_nestedco2Qgates))]
     # If it's not a list of "co2Qgates" (lists) then this is the list of gates to use.
     else:
         twoqubitgates = twoqubitgates_or_nestedco2Qgates
@@ -521,51 +510,39 @@ def circuit_layer_by_co2Qgates(pspec, qubit_labels, co2Qgates, co2Qgatesprob='un
     sampled_layer = []
     if qubit_labels is not None:
         assert(isinstance(qubit_labels, list) or isinstance(qubit_labels, tuple)), "SubsetQs must be a list or a tuple!"
-        remaining_qubits = list(qubit_labels[:])  # copy this list
+        qubits = qubit_labels
     else:
-        remaining_qubits = pspec.qubit_labels[:]  # copy this list
+        qubits = pspec.qubit_labels
+    usedqubits = set()
 
     # Go through the 2-qubit gates in the sector, and apply each one with probability twoQprob
-    for i in range(0, len(twoqubitgates)):
-        if _np.random.binomial(1, twoQprob) == 1:
-            gate = twoqubitgates[i]
-            # If it's a nested co2Qgates:
-            sampled_layer.append(gate)
-            # Delete the qubits that have been assigned a gate.
-            del remaining_qubits[remaining_qubits.index(gate.qubits[0])]
-            del remaining_qubits[remaining_qubits.index(gate.qubits[1])]
-
-    # Go through the qubits which don't have a 2-qubit gate assigned to them, and pick a 1-qubit gate
-    for i in range(0, len(remaining_qubits)):
-
-        qubit = remaining_qubits[i]
-
-        # If the 1-qubit gate names are specified, use these.
-        if oneQgatenames != 'all':
-            possibleops = [_lbl.Label(name, (qubit,)) for name in oneQgatenames]
-
-        # If the 1-qubit gate names are not specified, find the available 1-qubit gates
-        else:
-            if modelname == 'clifford':
-                possibleops = pspec.clifford_ops_on_qubits[(qubit,)]
-            else:
-                possibleops = pspec.models[modelname].get_primitive_op_labels()
-                l = len(possibleops)
-                for j in range(0, l):
-                    if possibleops[l - j].number_of_qubits != 1:
-                        del possibleops[l - j]
-                    else:
-                        if possibleops[l - j].qubits[0] != qubit:
-                            del possibleops[l - j]
-
-        gate = possibleops[_np.random.randint(0, len(possibleops))]
+    twoQgate_applied = rndm.random_sample(len(twoqubitgates)) < twoQprob
+    for i in _np.flatnonzero(twoQgate_applied):
+        gate = twoqubitgates[i]
         sampled_layer.append(gate)
+        # Record the qubits that have been assigned a gate.
+        usedqubits.update(gate.qubits)
+    remaining_qubits = [q for q in qubits if q not in usedqubits]
+
+    # Go through the qubits which don't have a 2-qubit gate assigned to them, and pick a 1-qubit gate. The
+    # gates for all of these qubits are drawn at once.
+    # If the 1-qubit gate names are specified, use these.
+    if oneQgatenames != 'all':
+        indices = rndm.randint(0, len(oneQgatenames), size=len(remaining_qubits))
+        sampled_layer.extend([_gate_label(oneQgatenames[i], (qubit,)) for i, qubit in zip(indices, remaining_qubits)])
+
+    # If the 1-qubit gate names are not specified, find the available 1-qubit gates
+    else:
+        oneQgates_on_qubit = pspec.get_gate_partition(modelname)['1Q_by_qubit']
+        possibleops = [oneQgates_on_qubit[qubit] for qubit in remaining_qubits]
+        indices = rndm.randint(0, [len(ops) for ops in possibleops]) if len(possibleops) > 0 else []
+        sampled_layer.extend([ops[i] for i, ops in zip(indices, possibleops)])
 
     return sampled_layer
 
 
 def circuit_layer_of_oneQgates(pspec, qubit_labels=None, oneQgatenames='all', pdist='uniform',
-                               modelname='clifford'):
+                               modelname='clifford', randState=None):
     """
     Samples a random circuit layer containing only 1-qubit gates. The allowed
     1-qubit gates are specified by `oneQgatenames`, and the 1-qubit gates are
@@ -600,59 +577,64 @@ def circuit_layer_of_oneQgates(pspec, qubit_labels=None, oneQgatenames='all', pd
         extract the model. The `clifford` default is suitable for Clifford or direct RB,
         but will not use any non-Clifford gates in the model.
 
+    randState : numpy.random.RandomState, optional
+        A RandomState object to generate samples from. If None, numpy's global random
+        state is used, so that `numpy.random.seed` makes the sampling reproducible.
+
     Returns
     -------
     list of gates
         A list of gate Labels that defines a "complete" circuit layer (there is one and
         only one gate acting on each qubit).
     """
+    rndm = _np.random if randState is None else randState
     if qubit_labels is not None:
         assert(isinstance(qubit_labels, list) or isinstance(qubit_labels, tuple)), "SubsetQs must be a list or a tuple!"
         qubits = list(qubit_labels[:])  # copy this list
     else:
         qubits = list(pspec.qubit_labels[:])  # copy this list
 
-    sampled_layer = []
-
     if isinstance(pdist, str): assert(pdist == 'uniform'), "If pdist is not a list or numpy.array it must be 'uniform'"
 
     if oneQgatenames == 'all':
         assert(pdist == 'uniform'), "If `oneQgatenames` = 'all', pdist must be 'uniform'"
-        if modelname == 'clifford':
-            for i in qubits:
-                try:
-                    gate = pspec.clifford_ops_on_qubits[(i,)][_np.random.randint(
-                        0, len(pspec.clifford_ops_on_qubits[(i,)]))]
-                    sampled_layer.append(gate)
-                except:
-                    raise ValueError("There are no 1Q Clifford gates on qubit {}!".format(i))
-        else: raise ValueError("Currently, 'modelname' must be 'clifford'")
+        if modelname != 'clifford': raise ValueError("Currently, 'modelname' must be 'clifford'")
+        # Look up the gates available on each qubit once, and then sample a gate for every qubit at once.
+        oneQgates_on_qubit = pspec.get_gate_partition('clifford')['1Q_by_qubit']
+        possibleops = [oneQgates_on_qubit.get(i, ()) for i in qubits]
+        for i, ops in zip(qubits, possibleops):
+            if len(ops) == 0: raise ValueError("There are no 1Q Clifford gates on qubit {}!".format(i))
+        indices = rndm.randint(0, _np.array([len(ops) for ops in possibleops], int))
+        sampled_layer = [ops[j] for j, ops in zip(indices, possibleops)]
 
     else:
         # A basic check for the validity of pdist.
         if not isinstance(pdist, str):
             assert(len(pdist) == len(oneQgatenames)), "The pdist probability distribution is invalid!"
 
-        # Find out how many 1-qubit gate names there are
-        num_oneQgatenames = len(oneQgatenames)
+        # Sample a gate name for each qubit. If 'uniform', then sample according to the uniform dist.
+        if isinstance(pdist, str):
+            indices = rndm.randint(0, len(oneQgatenames), size=len(qubits))
+        # If not 'uniform', then sample according to the user-specified dist.
+        else:
+            cumprobs = _np.cumsum(pdist, dtype=float)
+            cumprobs /= cumprobs[-1]
+            indices = _np.searchsorted(cumprobs, rndm.random_sample(len(qubits)), side='right')
+        sampled_layer = [_gate_label(oneQgatenames[j], (i,)) for j, i in zip(indices, qubits)]
 
-        # Sample a gate for each qubit.
-        for i in qubits:
+    return sampled_layer
 
-            # If 'uniform', then sample according to the uniform dist.
-            if isinstance(pdist, str): sampled_gatename = oneQgatenames[_np.random.randint(0, num_oneQgatenames)]
-            # If not 'uniform', then sample according to the user-specified dist.
-            else:
-                pdist = _np.array(pdist) / sum(pdist)
-                x = list(_np.random.multinomial(1, pdist))
-                sampled_gatename = oneQgatenames[x.index(1)]
-            # Add sampled gate to the layer.
-            sampled_layer.append(_lbl.Label(sampled_gatename, i))
 
-    return sampled_layer
+# The in-built layer samplers that can be specified by name in random_circuit().
+_layer_samplers = {'pairingQs': circuit_layer_by_pairing_qubits,
+                   'Qelimination': circuit_layer_by_Qelimination,
+                   'co2Qgates': circuit_layer_by_co2Qgates,
+                   'edgegrab': circuit_layer_by_edgegrab,
+                   'local': circuit_layer_of_oneQgates}
 
 
-def random_circuit(pspec, length, qubit_labels=None, sampler='Qelimination', samplerargs=[], addlocal=False, lsargs=[]):
+def random_circuit(pspec, length, qubit_labels=None, sampler='Qelimination', samplerargs=[], addlocal=False, lsargs=[],
+                   randState=None):
     """
     Samples a random circuit of the specified length (or ~ twice this length), using layers
     independently sampled according to the specified sampling distribution.
@@ -712,6 +694,12 @@ def random_circuit(pspec, length, qubit_labels=None, sampler='Qelimination', sam
         1-element list consisting of a list of the relevant gate names (e.g., `lsargs` = ['Gi,
         'Gxpi, 'Gypi', 'Gzpi']).
 
+    randState : numpy.random.RandomState, optional
+        A RandomState object to generate samples from. If not None, this is handed to the
+        sampler (and the 1-qubit gate layers sampler) as the keyword argument `randState`, so a
+        user-defined `sampler` function must then accept this argument. If None, numpy's global
+        random state is used.
+
     Returns
     -------
     Circuit
@@ -720,54 +708,48 @@ def random_circuit(pspec, length, qubit_labels=None, sampler='Qelimination', sam
     """
     if isinstance(sampler, str):
 
-        if sampler == 'pairingQs': sampler = circuit_layer_by_pairing_qubits
-        elif sampler == 'Qelimination': sampler = circuit_layer_by_Qelimination
-        elif sampler == 'co2Qgates':
-            sampler = circuit_layer_by_co2Qgates
+        if sampler == 'co2Qgates':
             assert(len(samplerargs) >= 1), \
                 ("The samplerargs must at least a 1-element list with the first element "
                  "the 'co2Qgates' argument of the co2Qgates sampler.")
         elif sampler == 'edgegrab':
-            sampler = circuit_layer_by_edgegrab
             assert(len(samplerargs) >= 1), \
                 ("The samplerargs must at least a 1-element list")
-        elif sampler == 'local': sampler = circuit_layer_of_oneQgates
-        else: raise ValueError("Sampler type not understood!")
+        if sampler not in _layer_samplers: raise ValueError("Sampler type not understood!")
+        sampler = _layer_samplers[sampler]
 
     if qubit_labels is not None:
         assert(isinstance(qubit_labels, list) or isinstance(qubit_labels, tuple)), "SubsetQs must be a list or a tuple!"
-        qubits = list(qubit_labels[:])  # copy this list
+        qubits = tuple(qubit_labels)  # not a copy if `qubit_labels` is already a tuple
     else:
-        qubits = list(pspec.qubit_labels[:])  # copy this list
+        qubits = tuple(pspec.qubit_labels)
 
-    # Initialize an empty circuit, to populate with sampled layers.
-    circuit = _cir.Circuit(layer_labels=[], line_labels=qubits, editable=True)
+    # The sampled layers are collected, and the circuit is only constructed from them at the end. Each
+    # layer is placed in front of those already sampled, so the first layer sampled is the last layer
+    # of the circuit.
+    layers = []
+    samplerkwargs = {} if randState is None else {'randState': randState}
 
     # If we are not add layers of random local gates between the layers, sample 'length' layers
     # according to the sampler `sampler`.
     if not addlocal:
         for i in range(0, length):
-            layer = sampler(pspec, qubit_labels, *samplerargs)
-            circuit.insert_layer(layer, 0)
-
-    # If we are adding layers of random local gates between the layers.
-    if addlocal:
-        for i in range(0, 2 * length + 1):
-            local = not bool(i % 2)
-            # For odd layers, we uniformly sample the specified type of local gates.
-            if local:
-                layer = circuit_layer_of_oneQgates(pspec, qubit_labels, *lsargs)
-            # For even layers, we sample according to the given distribution
-            else:
-                layer = sampler(pspec, qubit_labels, *samplerargs)
-            circuit.insert_layer(layer, 0)
+            layers.append(sampler(pspec, qubit_labels, *samplerargs, **samplerkwargs))
 
-    circuit.done_editing()
+    # If we are adding layers of random local gates between the layers, the even layers are sampled
+    # uniformly from the specified type of local gates, and the odd layers according to `sampler`.
+    else:
+        layers.append(circuit_layer_of_oneQgates(pspec, qubit_labels, *lsargs, **samplerkwargs))
+        for i in range(0, length):
+            layers.append(sampler(pspec, qubit_labels, *samplerargs, **samplerkwargs))
+            layers.append(circuit_layer_of_oneQgates(pspec, qubit_labels, *lsargs, **samplerkwargs))
+
+    circuit = _cir.Circuit(layer_labels=layers[::-1], line_labels=qubits)
     return circuit
 
 
 def simultaneous_random_circuit(pspec, length, structure='1Q', sampler='Qelimination', samplerargs=[], addlocal=False,
-                                lsargs=[]):
+                                lsargs=[], randState=None):
     """
     Generates a random circuit of the specified length.
 
@@ -812,6 +794,9 @@ def simultaneous_random_circuit(pspec, length, structure='1Q', sampler='Qelimina
         Only used if addlocal is True. A list of optional arguments handed to the 1Q gate
         layer sampler circuit_layer_by_oneQgate(). Specifies how to sample 1Q-gate layers.
 
+    randState : numpy.random.RandomState, optional
+        A RandomState object to generate samples from, which is handed to random_circuit() (see
+        the docstring of that function). If None, numpy's global random state is used.
 
     Returns
     -------
@@ -842,12 +827,10 @@ def simultaneous_random_circuit(pspec, length, structure='1Q', sampler='Qelimina
                ), "The qubits to benchmark must all be in the ProcessorSpec `pspec`!"
         n = len(qubits_used)
 
-    # Creates a empty circuit over no wires
-    circuit = _cir.Circuit(num_lines=0, editable=True)
-
     s_rc_dict = {}
     p_rc_dict = {}
     circuit_dict = {}
+    subset_circuits = []
 
     if isinstance(length, int):
         length_per_subset = [length for i in range(len(structure))]
@@ -855,42 +838,62 @@ def simultaneous_random_circuit(pspec, length, structure='1Q', sampler='Qelimina
         length_per_subset = length
         assert(len(length) == len(structure)), "If `length` is a list it must be the same length as `structure`"
 
+    # The symplectic reps of the gates in `pspec`, which are looked up once here rather than for every subset.
+    srep_dict = pspec.models['clifford'].get_clifford_symplectic_reps()
+
     for ssQs_ind, qubit_labels in enumerate(structure):
         qubit_labels = tuple(qubit_labels)
         # Sample a random circuit of "native gates" over this set of qubits, with the
         # specified sampling.
         subset_circuit = random_circuit(pspec=pspec, length=length_per_subset[ssQs_ind], qubit_labels=qubit_labels,
-                                        sampler=sampler, samplerargs=samplerargs, addlocal=addlocal, lsargs=lsargs)
+                                        sampler=sampler, samplerargs=samplerargs, addlocal=addlocal, lsargs=lsargs,
+                                        randState=randState)
         circuit_dict[qubit_labels] = subset_circuit
+        subset_circuits.append(subset_circuit)
         # find the symplectic matrix / phase vector this circuit implements.
         s_rc_dict[qubit_labels], p_rc_dict[qubit_labels] = _symp.symplectic_rep_of_clifford_circuit(
-            subset_circuit, pspec=pspec)
-        # Tensors this circuit with the current circuit
-        circuit.tensor_circuit(subset_circuit)
-
-    circuit.done_editing()
-
-    # Find the expected outcome of the circuit.
-    s_out, p_out = _symp.symplectic_rep_of_clifford_circuit(circuit, pspec=pspec)
+            subset_circuit, srep_dict=srep_dict)
+
+    # The subset circuits act on disjoint sets of qubits, so the tensor product of them is constructed in
+    # one go by merging their layers.
+    line_labels = tuple([q for subset_circuit in subset_circuits for q in subset_circuit.line_labels])
+    layers = _merge_disjoint_layers([[subset_circuit.get_layer(i) for i in range(subset_circuit.num_layers())]
+                                     for subset_circuit in subset_circuits])
+    circuit = _cir.Circuit(layer_labels=layers, line_labels=line_labels)
+
+    # Find the expected outcome of the circuit. The circuit is the tensor product of the subset circuits, and the
+    # qubits are ordered subset-by-subset in `circuit`, so its symplectic rep is the kronecker product of theirs.
+    s_out, p_out = _symp.symplectic_kronecker([(s_rc_dict[tuple(qubit_labels)], p_rc_dict[tuple(qubit_labels)])
+                                               for qubit_labels in structure])
     s_inputstate, p_inputstate = _symp.prep_stabilizer_state(n, zvals=None)
     s_outstate, p_outstate = _symp.apply_clifford_to_stabilizer_state(s_out, p_out, s_inputstate, p_inputstate)
+    # The qubits are ordered subset-by-subset in `circuit`, so the ith qubit in `structure` is on the ith line.
+    probs = _symp.pauli_z_measurement_probs(s_outstate, p_outstate, range(n)).tolist()
     idealout = []
+    qind = 0
     for qubit_labels in structure:
-        subset_idealout = []
-        for q in qubit_labels:
-            qind = circuit.line_labels.index(q)
-            measurement_out = _symp.pauli_z_measurement(s_outstate, p_outstate, qind)
-            subset_idealout.append(measurement_out[1])
-        idealout.append(tuple(subset_idealout))
+        idealout.append(tuple(probs[qind:qind + len(qubit_labels)]))
+        qind += len(qubit_labels)
     idealout = tuple(idealout)
 
     return circuit, idealout
 
 
+def _merge_disjoint_layers(layers_per_subset):
+    """
+    Merges the layers of circuits that act on disjoint sets of qubits into the layers of their
+    tensor product. Each element of `layers_per_subset` is the list of layers (each a sequence
+    of gate Labels) of one circuit, and a circuit that is shorter than the others idles at the end.
+    """
+    depth = max([len(layers) for layers in layers_per_subset])
+    return [[gate for layers in layers_per_subset if i < len(layers) for gate in layers[i]] for i in range(depth)]
+
+
 def _get_setting(l, circuitindex, substructure, depths, circuits_per_length, structure):
 
     lind = depths.index(l)
     settingDict = {}
+    substructure = frozenset(substructure)
 
     for s in structure:
         if s in substructure:
@@ -904,7 +907,8 @@ def _get_setting(l, circuitindex, substructure, depths, circuits_per_length, str
 def simultaneous_random_circuits_experiment(pspec, depths, circuits_per_length, structure='1Q', sampler='Qelimination',
                                             samplerargs=[], addlocal=False, lsargs=[], set_isolated=True,
                                             setcomplement_isolated=False,
-                                            descriptor='A set of simultaneous random circuits', verbosity=1):
+                                            descriptor='A set of simultaneous random circuits', verbosity=1,
+                                            seed=None, randState=None):
     """
     Generates a set of simultaneous random circuits of the specified depths.
 
@@ -964,6 +968,15 @@ def simultaneous_random_circuits_experiment(pspec, depths, circuits_per_length,
     verbosity : int, optional
         If > 0 the number of circuits generated so far is shown.
 
+    seed : int, optional
+        Seed for the random number generator used to sample all of the circuits. Only used if
+        `randState` is None.
+
+    randState : numpy.random.RandomState, optional
+        A RandomState object to generate samples from. All of the circuits in the experiment are
+        sampled from this single stream. If both this and `seed` are None, numpy's global random
+        state is used.
+
     Returns
     -------
     dict
@@ -994,6 +1007,9 @@ def simultaneous_random_circuits_experiment(pspec, depths, circuits_per_length,
     experiment_dict['spec']['descriptor'] = descriptor
     experiment_dict['spec']['createdby'] = 'extras.rb.sample.simultaneous_random_circuits_experiment'
 
+    if randState is None and seed is not None:
+        randState = _np.random.RandomState(seed)
+
     if isinstance(structure, str):
         assert(structure == '1Q'), "The only default `structure` option is the string '1Q'"
         structure = tuple([(q,) for q in pspec.qubit_labels])
@@ -1010,11 +1026,16 @@ def simultaneous_random_circuits_experiment(pspec, depths, circuits_per_length,
 
         assert(set(qubits_used).issubset(set(pspec.qubit_labels))), \
             "The qubits to benchmark must all be in the ProcessorSpec `pspec`!"
+        # Each subset is converted to a tuple once here, so that this is not redone for every circuit.
+        structure = tuple([tuple(qubit_labels) for qubit_labels in structure])
 
     experiment_dict['spec']['structure'] = structure
     experiment_dict['circuits'] = {}
     experiment_dict['probs'] = {}
     experiment_dict['settings'] = {}
+    # The index of the subset in `structure` that contains each qubit, and the complement of each subset.
+    subset_index = {q: subset_ind for subset_ind, subset in enumerate(structure) for q in subset}
+    subset_complements = [structure[:subset_ind] + structure[subset_ind + 1:] for subset_ind in range(len(structure))]
 
     for lnum, l in enumerate(depths):
         if verbosity > 0:
@@ -1023,56 +1044,55 @@ def simultaneous_random_circuits_experiment(pspec, depths, circuits_per_length,
             print('  - Number of circuits sampled = ', end='')
         for j in range(circuits_per_length):
             circuit, idealout = simultaneous_random_circuit(pspec, l, structure=structure, sampler=sampler,
-                                                            samplerargs=samplerargs, addlocal=addlocal, lsargs=lsargs)
+                                                            samplerargs=samplerargs, addlocal=addlocal, lsargs=lsargs,
+                                                            randState=randState)
 
             if (not set_isolated) and (not setcomplement_isolated):
                 experiment_dict['circuits'][l, j] = circuit
                 experiment_dict['probs'][l, j] = idealout
                 experiment_dict['settings'][l, j] = {
-                    s: len(depths) + lnum * circuits_per_length + j for s in tuple(structure)}
+                    s: len(depths) + lnum * circuits_per_length + j for s in structure}
             else:
                 experiment_dict['circuits'][l, j] = {}
                 experiment_dict['probs'][l, j] = {}
                 experiment_dict['settings'][l, j] = {}
-                experiment_dict['circuits'][l, j][tuple(structure)] = circuit
-                experiment_dict['probs'][l, j][tuple(structure)] = idealout
-                experiment_dict['settings'][l, j][tuple(structure)] = _get_setting(l, j, structure, depths,
-                                                                                   circuits_per_length, structure)
+                experiment_dict['circuits'][l, j][structure] = circuit
+                experiment_dict['probs'][l, j][structure] = idealout
+                experiment_dict['settings'][l, j][structure] = _get_setting(l, j, structure, depths,
+                                                                            circuits_per_length, structure)
+                # The isolated circuits are constructed directly from the layers of `circuit`, by keeping the
+                # gates in a subset (or its complement), rather than by copying `circuit` and idling lines. Each
+                # gate acts on qubits in only one subset, so its subset is found from its first qubit.
+                layers = [circuit.get_layer(i) for i in range(circuit.num_layers())]
+                layers_subset_index = [[subset_index[gate.qubits[0]] for gate in layer] for layer in layers]
+
             if set_isolated:
                 for subset_ind, subset in enumerate(structure):
-                    subset_circuit = circuit.copy(editable=True)
-                    #print(subset)
-                    for q in circuit.line_labels:
-                        if q not in subset:
-                            #print(subset_circuit, q)
-                            subset_circuit.replace_with_idling_line(q)
-                    subset_circuit.done_editing()
-                    experiment_dict['circuits'][l, j][(tuple(subset),)] = subset_circuit
-                    experiment_dict['probs'][l, j][(tuple(subset),)] = idealout[subset_ind]
+                    subset_circuit = _cir.Circuit(
+                        layer_labels=[[gate for gate, k in zip(layer, layer_subset_index) if k == subset_ind]
+                                      for layer, layer_subset_index in zip(layers, layers_subset_index)],
+                        line_labels=circuit.line_labels)
+                    experiment_dict['circuits'][l, j][(subset,)] = subset_circuit
+                    experiment_dict['probs'][l, j][(subset,)] = idealout[subset_ind]
                     # setting = {}
                     # for s in structure:
                     #     if s in subset:
                     #         setting[s] =  len(depths) + lnum*circuits_per_length + j
                     #     else:
                     #         setting[s] =  lnum
-                    experiment_dict['settings'][l, j][(tuple(subset),)] = _get_setting(l, j, (tuple(subset),), depths,
-                                                                                       circuits_per_length, structure)
+                    experiment_dict['settings'][l, j][(subset,)] = _get_setting(l, j, (subset,), depths,
+                                                                                circuits_per_length, structure)
                     # print(subset)
                     # print(_get_setting(l, j, subset, depths, circuits_per_length, structure))
 
             if setcomplement_isolated:
                 for subset_ind, subset in enumerate(structure):
-                    subsetcomplement_circuit = circuit.copy(editable=True)
-                    for q in circuit.line_labels:
-                        if q in subset:
-                            subsetcomplement_circuit.replace_with_idling_line(q)
-                    subsetcomplement_circuit.done_editing()
-                    subsetcomplement = list(_copy.copy(structure))
-                    subsetcomplement_idealout = list(_copy.copy(idealout))
-                    del subsetcomplement[subset_ind]
-                    del subsetcomplement_idealout[subset_ind]
-                    subsetcomplement = tuple(subsetcomplement)
-                    subsetcomplement_idealout = tuple(subsetcomplement_idealout)
+                    subsetcomplement_circuit = _cir.Circuit(
+                        layer_labels=[[gate for gate, k in zip(layer, layer_subset_index) if k != subset_ind]
+                                      for layer, layer_subset_index in zip(layers, layers_subset_index)],
+                        line_labels=circuit.line_labels)
+                    subsetcomplement = subset_complements[subset_ind]
+                    subsetcomplement_idealout = idealout[:subset_ind] + idealout[subset_ind + 1:]
                     experiment_dict['circuits'][l, j][subsetcomplement] = subsetcomplement_circuit
                     experiment_dict['probs'][l, j][subsetcomplement] = subsetcomplement_idealout
 
@@ -1183,23 +1203,42 @@ def exhaustive_independent_random_circuits_experiment(pspec, allowed_depths, cir
 
     experiment_dict['subset_circuits'] = circuits
 
+    # The layers of each subset circuit are extracted once, as every subset circuit appears in many of the
+    # parallel circuits. Each parallel circuit is then constructed in one go from the merged layers.
+    line_labels = tuple([q for qubit_labels in structure for q in qubit_labels])
+    subset_layers = [[[c.get_layer(i) for i in range(c.num_layers())] for c in circuits[qubit_labels]]
+                     for qubit_labels in structure]
     parallel_circuits = {}
     it = [range(circuits_per_subset) for i in range(len(structure))]
     for setting_comb in _itertools.product(*it):
-        pcircuit = _cir.Circuit(num_lines=0, editable=True)
-        for ssQs_ind, qubit_labels in enumerate(structure):
-            pcircuit.tensor_circuit(circuits[qubit_labels][setting_comb[ssQs_ind]])
-            pcircuit.done_editing()
-            parallel_circuits[setting_comb] = pcircuit
+        layers = _merge_disjoint_layers([subset_layers[ssQs_ind][setting_comb[ssQs_ind]]
+                                         for ssQs_ind in range(len(structure))])
+        parallel_circuits[setting_comb] = _cir.Circuit(layer_labels=layers, line_labels=line_labels)
 
     experiment_dict['circuits'] = parallel_circuits
 
     return experiment_dict
 
 
+def _compile(compiler, s, p, pspec, qubit_labels, citerations, compilerargs, compile_cache):
+    """
+    Compiles the Clifford (or stabilizer state) `(s, p)` with the function `compiler`, which is one of
+    the compile_clifford / compile_stabilizer_state / compile_stabilizer_measurement functions. If
+    `compile_cache` is not None, the compiled circuit is looked up in (or added to) this dictionary.
+    """
+    if compile_cache is None:
+        return compiler(s, p, pspec, qubit_labels, citerations, *compilerargs)
+
+    key = (compiler.__name__, None if qubit_labels is None else tuple(qubit_labels), s.tobytes(), p.tobytes())
+    if key not in compile_cache:
+        compile_cache[key] = compiler(s, p, pspec, qubit_labels, citerations, *compilerargs)
+    # A copy is returned, as the returned circuit may be edited (or handed to the user).
+    return compile_cache[key].copy()
+
+
 def direct_rb_circuit(pspec, length, qubit_labels=None, sampler='Qelimination', samplerargs=[], addlocal=False,
                       lsargs=[], randomizeout=True, cliffordtwirl=True, conditionaltwirl=True, citerations=20,
-                      compilerargs=[], partitioned=False):
+                      compilerargs=[], partitioned=False, compile_cache=None):
     """
     Generates a "direct randomized benchmarking" (DRB) circuit, which is the protocol introduced in
     arXiv:1807.07975 (2018). The length of the "core" sequence is given by `length` and may be any
@@ -1300,6 +1339,15 @@ def direct_rb_circuit(pspec, length, qubit_labels=None, sampler='Qelimination',
         (3) the pre-measurement circuit. In that case the full circuit is obtained by appended (2) to (1)
         and then (3) to (1).
 
+    compile_cache : dict, optional
+        If not None, a dictionary in which the compiled circuits for steps (1) and (3) are stored, keyed
+        by the Clifford (or stabilizer state) that is compiled and the qubits it is compiled for. A
+        compilation that is already in the dictionary is reused rather than recompiled, which can greatly
+        reduce the time needed to generate many DRB circuits on a small number of qubits (e.g., there are
+        only 24 single-qubit Cliffords). The same dictionary should only be shared between calls with the
+        same `pspec`, `citerations` and `compilerargs`. Note that, because the compilers are randomized,
+        the compilation chosen for a particular Clifford is then always the same.
+
     Returns
     -------
     Circuit or list of Circuits
@@ -1321,8 +1369,11 @@ def direct_rb_circuit(pspec, length, qubit_labels=None, sampler='Qelimination',
     # Sample a random circuit of "native gates".
     circuit = random_circuit(pspec=pspec, length=length, qubit_labels=qubit_labels, sampler=sampler,
                              samplerargs=samplerargs, addlocal=addlocal, lsargs=lsargs)
+    # The symplectic reps of the gates in `pspec`, which are looked up once here rather than in every call to
+    # symplectic_rep_of_clifford_circuit.
+    srep_dict = pspec.models['clifford'].get_clifford_symplectic_reps()
     # find the symplectic matrix / phase vector this "native gates" circuit implements.
-    s_rc, p_rc = _symp.symplectic_rep_of_clifford_circuit(circuit, pspec=pspec)
+    s_rc, p_rc = _symp.symplectic_rep_of_clifford_circuit(circuit, srep_dict=srep_dict)
 
     # If we are clifford twirling, we do an initial random circuit that is either a uniformly random
     # cliffor or creates a uniformly random stabilizer state from the standard input.
@@ -1333,16 +1384,16 @@ def direct_rb_circuit(pspec, length, qubit_labels=None, sampler='Qelimination',
         s_composite, p_composite = _symp.compose_cliffords(s_initial, p_initial, s_rc, p_rc)
         # If conditionaltwirl we do a stabilizer prep (a conditional Clifford).
         if conditionaltwirl:
-            initial_circuit = _cmpl.compile_stabilizer_state(s_initial, p_initial, pspec, qubit_labels, citerations,
-                                                             *compilerargs)
+            initial_circuit = _compile(_cmpl.compile_stabilizer_state, s_initial, p_initial, pspec, qubit_labels,
+                                       citerations, compilerargs, compile_cache)
         # If not conditionaltwirl, we do a full random Clifford.
-        else: initial_circuit = _cmpl.compile_clifford(s_initial, p_initial, pspec, qubit_labels, citerations,
-                                                       *compilerargs)
+        else: initial_circuit = _compile(_cmpl.compile_clifford, s_initial, p_initial, pspec, qubit_labels,
+                                         citerations, compilerargs, compile_cache)
     # If we are not Clifford twirling, we just copy the effect of the random circuit as the effect
     # of the "composite" prep + random circuit (as here the prep circuit is the null circuit).
     else:
-        s_composite = _copy.deepcopy(s_rc)
-        p_composite = _copy.deepcopy(p_rc)
+        s_composite = s_rc.copy()
+        p_composite = p_rc.copy()
 
     if conditionaltwirl:
         # If we want to randomize the expected output then randomize the p vector, otherwise
@@ -1350,8 +1401,8 @@ def direct_rb_circuit(pspec, length, qubit_labels=None, sampler='Qelimination',
         # before handing it to the stabilizer measurement function.
         if randomizeout: p_for_measurement = _symp.random_phase_vector(s_composite, n)
         else: p_for_measurement = p_composite
-        inversion_circuit = _cmpl.compile_stabilizer_measurement(s_composite, p_for_measurement, pspec, qubit_labels,
-                                                                 citerations, *compilerargs)
+        inversion_circuit = _compile(_cmpl.compile_stabilizer_measurement, s_composite, p_for_measurement, pspec,
+                                     qubit_labels, citerations, compilerargs, compile_cache)
     else:
         # Find the Clifford that inverts the circuit so far. We
         s_inverse, p_inverse = _symp.inverse_clifford(s_composite, p_composite)
@@ -1360,20 +1411,24 @@ def direct_rb_circuit(pspec, length, qubit_labels=None, sampler='Qelimination',
         if randomizeout: p_for_inversion = _symp.random_phase_vector(s_inverse, n)
         else: p_for_inversion = p_inverse
         # Compile the Clifford.
-        inversion_circuit = _cmpl.compile_clifford(s_inverse, p_for_inversion, pspec, qubit_labels,
-                                                   citerations, *compilerargs)
+        inversion_circuit = _compile(_cmpl.compile_clifford, s_inverse, p_for_inversion, pspec, qubit_labels,
+                                     citerations, compilerargs, compile_cache)
+    # The full circuit is constructed in one go from the layers of its segments, which all have the same lines.
+    segments = [initial_circuit, circuit, inversion_circuit] if cliffordtwirl else [circuit, inversion_circuit]
+    full_circuit = _cir.Circuit(layer_labels=[list(segment.get_layer(i)) for segment in segments
+                                              for i in range(segment.num_layers())], line_labels=circuit.line_labels)
+
+    # Find the expected outcome of the circuit. The symplectic rep of the core random circuit is already known, so
+    # it is composed with the reps of the (short) initial and inversion circuits, rather than recomputing the rep of
+    # the entire circuit.
+    s_out, p_out = s_rc, p_rc
     if cliffordtwirl:
-        full_circuit = initial_circuit.copy(editable=True)
-        full_circuit.append_circuit(circuit)
-        full_circuit.append_circuit(inversion_circuit)
-    else:
-        full_circuit = circuit.copy(editable=True)
-        full_circuit.append_circuit(inversion_circuit)
-
-    full_circuit.done_editing()
-
-    # Find the expected outcome of the circuit.
-    s_out, p_out = _symp.symplectic_rep_of_clifford_circuit(full_circuit, pspec=pspec)
+        s_initial_circuit, p_initial_circuit = _symp.symplectic_rep_of_clifford_circuit(initial_circuit,
+                                                                                        srep_dict=srep_dict)
+        s_out, p_out = _symp.compose_cliffords(s_initial_circuit, p_initial_circuit, s_out, p_out)
+    s_inversion_circuit, p_inversion_circuit = _symp.symplectic_rep_of_clifford_circuit(inversion_circuit,
+                                                                                        srep_dict=srep_dict)
+    s_out, p_out = _symp.compose_cliffords(s_out, p_out, s_inversion_circuit, p_inversion_circuit)
     if conditionaltwirl:  # s_out is not always the identity with a conditional twirl, only conditional on prep/measure.
         assert(_np.array_equal(s_out[:n, n:], _np.zeros((n, n), int))), "Compiler has failed!"
     else: assert(_np.array_equal(s_out, _np.identity(2 * n, int))), "Compiler has failed!"
@@ -1381,16 +1436,11 @@ def direct_rb_circuit(pspec, length, qubit_labels=None, sampler='Qelimination',
     # Find the ideal output of the circuit.
     s_inputstate, p_inputstate = _symp.prep_stabilizer_state(n, zvals=None)
     s_outstate, p_outstate = _symp.apply_clifford_to_stabilizer_state(s_out, p_out, s_inputstate, p_inputstate)
-    idealout = []
-    for q in range(0, n):
-        measurement_out = _symp.pauli_z_measurement(s_outstate, p_outstate, q)
-        bit = measurement_out[1]
-        assert(bit == 0 or bit == 1), "Ideal output is not a computational basis state!"
-        if not randomizeout:
-            assert(bit == 0), "Ideal output is not the all 0s computational basis state!"
-        idealout.append(int(measurement_out[1]))
-    idealout = tuple(idealout)
-    full_circuit.done_editing()
+    bits = _symp.pauli_z_measurement_probs(s_outstate, p_outstate, range(n))
+    assert(_np.all((bits == 0) | (bits == 1))), "Ideal output is not a computational basis state!"
+    if not randomizeout:
+        assert(_np.all(bits == 0)), "Ideal output is not the all 0s computational basis state!"
+    idealout = tuple(bits.astype(int).tolist())
 
     if not partitioned: outcircuit = full_circuit
     else:
@@ -1402,7 +1452,8 @@ def direct_rb_circuit(pspec, length, qubit_labels=None, sampler='Qelimination',
 
 def simultaneous_direct_rb_circuit(pspec, length, structure='1Q', sampler='Qelimination', samplerargs=[],
                                    addlocal=False, lsargs=[], randomizeout=True, cliffordtwirl=True,
-                                   conditionaltwirl=True, citerations=20, compilerargs=[], partitioned=False):
+                                   conditionaltwirl=True, citerations=20, compilerargs=[], partitioned=False,
+                                   compile_cache=None):
     """
     Generates a simultansous "direct randomized benchmarking" (DRB) circuit, where DRB is the protocol introduced in
     arXiv:1807.07975 (2018). An n-qubit DRB circuit consists of (1) a circuit the prepares a uniformly random
@@ -1500,6 +1551,15 @@ def simultaneous_direct_rb_circuit(pspec, length, structure='1Q', sampler='Qelim
         (3) the pre-measurement circuit. In that case the full circuit is obtained by appended (2) to (1)
         and then (3) to (1).
 
+    compile_cache : dict, optional
+        If not None, a dictionary in which the compiled circuits for steps (1) and (3) are stored, keyed
+        by the Clifford (or stabilizer state) that is compiled and the qubits it is compiled for. A
+        compilation that is already in the dictionary is reused rather than recompiled, which can greatly
+        reduce the time needed to generate many DRB circuits on a small number of qubits (e.g., there are
+        only 24 single-qubit Cliffords). The same dictionary should only be shared between calls with the
+        same `pspec`, `citerations` and `compilerargs`. Note that, because the compilers are randomized,
+        the compilation chosen for a particular Clifford is then always the same.
+
     Returns
     -------
     Circuit or list of Circuits
@@ -1546,6 +1606,9 @@ def simultaneous_direct_rb_circuit(pspec, length, structure='1Q', sampler='Qelim
     s_rc_dict = {}
     p_rc_dict = {}
     circuit_dict = {}
+    # The symplectic reps of the gates in `pspec`, which are looked up once here rather than in every call to
+    # symplectic_rep_of_clifford_circuit.
+    srep_dict = pspec.models['clifford'].get_clifford_symplectic_reps()
 
     for qubit_labels in structure:
         qubit_labels = tuple(qubit_labels)
@@ -1556,7 +1619,7 @@ def simultaneous_direct_rb_circuit(pspec, length, structure='1Q', sampler='Qelim
         circuit_dict[qubit_labels] = subset_circuit
         # find the symplectic matrix / phase vector this circuit implements.
         s_rc_dict[qubit_labels], p_rc_dict[qubit_labels] = _symp.symplectic_rep_of_clifford_circuit(
-            subset_circuit, pspec=pspec)
+            subset_circuit, srep_dict=srep_dict)
         # Tensors this circuit with the current circuit
         circuit.tensor_circuit(subset_circuit)
 
@@ -1580,20 +1643,20 @@ def simultaneous_direct_rb_circuit(pspec, length, structure='1Q', sampler='Qelim
 
             # If conditionaltwirl we do a stabilizer prep (a conditional Clifford).
             if conditionaltwirl:
-                subset_initial_circuit = _cmpl.compile_stabilizer_state(s_initial, p_initial, pspec, qubit_labels,
-                                                                        citerations, *compilerargs)
+                subset_initial_circuit = _compile(_cmpl.compile_stabilizer_state, s_initial, p_initial, pspec,
+                                                  qubit_labels, citerations, compilerargs, compile_cache)
             # If not conditionaltwirl, we do a full random Clifford.
             else:
-                subset_initial_circuit = _cmpl.compile_clifford(s_initial, p_initial, pspec, qubit_labels, citerations,
-                                                                *compilerargs)
+                subset_initial_circuit = _compile(_cmpl.compile_clifford, s_initial, p_initial, pspec, qubit_labels,
+                                                  citerations, compilerargs, compile_cache)
 
             initial_circuit.tensor_circuit(subset_initial_circuit)
 
         # If we are not Clifford twirling, we just copy the effect of the random circuit as the effect
         # of the "composite" prep + random circuit (as here the prep circuit is the null circuit).
         else:
-            s_composite = _copy.deepcopy(s_rc_dict[qubit_labels])
-            p_composite = _copy.deepcopy(p_rc_dict[qubit_labels])
+            s_composite = s_rc_dict[qubit_labels].copy()
+            p_composite = p_rc_dict[qubit_labels].copy()
 
         if conditionaltwirl:
             # If we want to randomize the expected output then randomize the p vector, otherwise
@@ -1601,8 +1664,8 @@ def simultaneous_direct_rb_circuit(pspec, length, structure='1Q', sampler='Qelim
             # before handing it to the stabilizer measurement function.
             if randomizeout: p_for_measurement = _symp.random_phase_vector(s_composite, subset_n)
             else: p_for_measurement = p_composite
-            subset_inversion_circuit = _cmpl.compile_stabilizer_measurement(s_composite, p_for_measurement, pspec,
-                                                                            qubit_labels, citerations, *compilerargs)
+            subset_inversion_circuit = _compile(_cmpl.compile_stabilizer_measurement, s_composite, p_for_measurement,
+                                                pspec, qubit_labels, citerations, compilerargs, compile_cache)
         else:
             # Find the Clifford that inverts the circuit so far. We
             s_inverse, p_inverse = _symp.inverse_clifford(s_composite, p_composite)
@@ -1611,25 +1674,30 @@ def simultaneous_direct_rb_circuit(pspec, length, structure='1Q', sampler='Qelim
             if randomizeout: p_for_inversion = _symp.random_phase_vector(s_inverse, subset_n)
             else: p_for_inversion = p_inverse
             # Compile the Clifford.
-            subset_inversion_circuit = _cmpl.compile_clifford(s_inverse, p_for_inversion, pspec, qubit_labels,
-                                                              citerations, *compilerargs)
+            subset_inversion_circuit = _compile(_cmpl.compile_clifford, s_inverse, p_for_inversion, pspec,
+                                                qubit_labels, citerations, compilerargs, compile_cache)
 
         inversion_circuit.tensor_circuit(subset_inversion_circuit)
 
     inversion_circuit.done_editing()
 
-    if cliffordtwirl:
-        full_circuit = initial_circuit.copy(editable=True)
-        full_circuit.append_circuit(circuit)
-        full_circuit.append_circuit(inversion_circuit)
-    else:
-        full_circuit = _copy.deepcopy(circuit)
-        full_circuit.append_circuit(inversion_circuit)
-
-    full_circuit.done_editing()
+    # The full circuit is constructed in one go from the layers of its segments, which all have the same lines.
+    segments = [initial_circuit, circuit, inversion_circuit] if cliffordtwirl else [circuit, inversion_circuit]
+    full_circuit = _cir.Circuit(layer_labels=[list(segment.get_layer(i)) for segment in segments
+                                              for i in range(segment.num_layers())], line_labels=circuit.line_labels)
 
-    # Find the expected outcome of the circuit.
-    s_out, p_out = _symp.symplectic_rep_of_clifford_circuit(full_circuit, pspec=pspec)
+    # Find the expected outcome of the circuit. The core random circuit is the tensor product of the subset circuits,
+    # so its symplectic rep is the kronecker product of theirs. This is composed with the reps of the (short) initial
+    # and inversion circuits, rather than recomputing the rep of the entire circuit.
+    s_out, p_out = _symp.symplectic_kronecker([(s_rc_dict[tuple(qubit_labels)], p_rc_dict[tuple(qubit_labels)])
+                                               for qubit_labels in structure])
+    if cliffordtwirl:
+        s_initial_circuit, p_initial_circuit = _symp.symplectic_rep_of_clifford_circuit(initial_circuit,
+                                                                                        srep_dict=srep_dict)
+        s_out, p_out = _symp.compose_cliffords(s_initial_circuit, p_initial_circuit, s_out, p_out)
+    s_inversion_circuit, p_inversion_circuit = _symp.symplectic_rep_of_clifford_circuit(inversion_circuit,
+                                                                                        srep_dict=srep_dict)
+    s_out, p_out = _symp.compose_cliffords(s_out, p_out, s_inversion_circuit, p_inversion_circuit)
     if conditionaltwirl:  # s_out is not always the identity with a conditional twirl, only conditional on prep/measure.
         assert(_np.array_equal(s_out[:n, n:], _np.zeros((n, n), int))), "Compiler has failed!"
     else: assert(_np.array_equal(s_out, _np.identity(2 * n, int))), "Compiler has failed!"
@@ -1637,18 +1705,18 @@ def simultaneous_direct_rb_circuit(pspec, length, structure='1Q', sampler='Qelim
     # Find the ideal output of the circuit.
     s_inputstate, p_inputstate = _symp.prep_stabilizer_state(n, zvals=None)
     s_outstate, p_outstate = _symp.apply_clifford_to_stabilizer_state(s_out, p_out, s_inputstate, p_inputstate)
+    label_to_qind = {q: i for i, q in enumerate(circuit.line_labels)}
+    bits = _symp.pauli_z_measurement_probs(s_outstate, p_outstate,
+                                           [label_to_qind[q] for qubit_labels in structure for q in qubit_labels])
+    assert(_np.all((bits == 0) | (bits == 1))), "Ideal output is not a computational basis state!"
+    if not randomizeout:
+        assert(_np.all(bits == 0)), "Ideal output is not the all 0s computational basis state!"
+    bits = bits.astype(int).tolist()
     idealout = []
+    qind = 0
     for qubit_labels in structure:
-        subset_idealout = []
-        for q in qubit_labels:
-            qind = circuit.line_labels.index(q)
-            measurement_out = _symp.pauli_z_measurement(s_outstate, p_outstate, qind)
-            bit = measurement_out[1]
-            assert(bit == 0 or bit == 1), "Ideal output is not a computational basis state!"
-            if not randomizeout:
-                assert(bit == 0), "Ideal output is not the all 0s computational basis state!"
-            subset_idealout.append(int(bit))
-        idealout.append(tuple(subset_idealout))
+        idealout.append(tuple(bits[qind:qind + len(qubit_labels)]))
+        qind += len(qubit_labels)
     idealout = tuple(idealout)
 
     if not partitioned: outcircuit = full_circuit
@@ -1663,7 +1731,8 @@ def simultaneous_direct_rb_experiment(pspec, depths, circuits_per_length, struct
                                       samplerargs=[], addlocal=False, lsargs=[], randomizeout=False, cliffordtwirl=True,
                                       conditionaltwirl=True, citerations=20, compilerargs=[], partitioned=False,
                                       set_isolated=True, setcomplement_isolated=False,
-                                      descriptor='A set of simultaneous DRB experiments', verbosity=1):
+                                      descriptor='A set of simultaneous DRB experiments', verbosity=1,
+                                      compile_cache=None):
     """
     Generates a simultaneous "direct randomized benchmarking" (DRB) experiments, where DRB is the protocol introduced in
     arXiv:1807.07975 (2018). The
@@ -1778,6 +1847,11 @@ def simultaneous_direct_rb_experiment(pspec, depths, circuits_per_length, struct
     verbosity : int, optional
         If > 0 the number of circuits generated so far is shown.
 
+    compile_cache : dict, optional
+        If not None, a dictionary of compiled stabilizer-prep and pre-measurement circuits that is shared
+        between all the sampled circuits (and that can be shared with other calls with the same `pspec`,
+        `citerations` and `compilerargs`). See :func:`direct_rb_circuit`.
+
     Returns
     -------
     Circuit or list of Circuits
@@ -1848,11 +1922,20 @@ def simultaneous_direct_rb_experiment(pspec, depths, circuits_per_length, struct
 
         assert(set(qubits_used).issubset(set(pspec.qubit_labels))), \
             "The qubits to benchmark must all be in the ProcessorSpec `pspec`!"
+        # Each subset is converted to a tuple once here, so that this is not redone for every circuit.
+        structure = tuple([tuple(qubit_labels) for qubit_labels in structure])
 
     experiment_dict['spec']['structure'] = structure
     experiment_dict['circuits'] = {}
     experiment_dict['target'] = {}
     experiment_dict['settings'] = {}
+    # The lines that are idled to isolate each subset (or its complement). These only depend on `structure`.
+    qubits_in_structure = [q for subset in structure for q in subset]
+    lines_outside_subset = []
+    for subset in structure:
+        subset_set = frozenset(subset)
+        lines_outside_subset.append(tuple([q for q in qubits_in_structure if q not in subset_set]))
+    subset_complements = [structure[:subset_ind] + structure[subset_ind + 1:] for subset_ind in range(len(structure))]
 
     for qubit_labels in structure:
         subgraph = pspec.qubitgraph.subgraph(list(qubit_labels))
@@ -1871,7 +1954,7 @@ def simultaneous_direct_rb_experiment(pspec, depths, circuits_per_length, struct
                                                                cliffordtwirl=cliffordtwirl,
                                                                conditionaltwirl=conditionaltwirl,
                                                                citerations=citerations, compilerargs=compilerargs,
-                                                               partitioned=partitioned)
+                                                               partitioned=partitioned, compile_cache=compile_cache)
 
             if (not set_isolated) and (not setcomplement_isolated):
                 experiment_dict['circuits'][l, j] = circuit
@@ -1881,36 +1964,30 @@ def simultaneous_direct_rb_experiment(pspec, depths, circuits_per_length, struct
                 experiment_dict['circuits'][l, j] = {}
                 experiment_dict['target'][l, j] = {}
                 experiment_dict['settings'][l, j] = {}
-                experiment_dict['circuits'][l, j][tuple(structure)] = circuit
-                experiment_dict['target'][l, j][tuple(structure)] = idealout
-                experiment_dict['settings'][l, j][tuple(structure)] = _get_setting(l, j, structure, depths,
-                                                                                   circuits_per_length, structure)
+                experiment_dict['circuits'][l, j][structure] = circuit
+                experiment_dict['target'][l, j][structure] = idealout
+                experiment_dict['settings'][l, j][structure] = _get_setting(l, j, structure, depths,
+                                                                            circuits_per_length, structure)
 
             if set_isolated:
                 for subset_ind, subset in enumerate(structure):
                     subset_circuit = circuit.copy(editable=True)
-                    for q in circuit.line_labels:
-                        if q not in subset:
-                            subset_circuit.replace_with_idling_line(q)
+                    for q in lines_outside_subset[subset_ind]:
+                        subset_circuit.replace_with_idling_line(q)
                     subset_circuit.done_editing()
-                    experiment_dict['circuits'][l, j][(tuple(subset),)] = subset_circuit
-                    experiment_dict['target'][l, j][(tuple(subset),)] = (idealout[subset_ind],)
-                    experiment_dict['settings'][l, j][(tuple(subset),)] = _get_setting(l, j, (tuple(subset),), depths,
-                                                                                       circuits_per_length, structure)
+                    experiment_dict['circuits'][l, j][(subset,)] = subset_circuit
+                    experiment_dict['target'][l, j][(subset,)] = (idealout[subset_ind],)
+                    experiment_dict['settings'][l, j][(subset,)] = _get_setting(l, j, (subset,), depths,
+                                                                                circuits_per_length, structure)
 
             if setcomplement_isolated:
                 for subset_ind, subset in enumerate(structure):
                     subsetcomplement_circuit = circuit.copy(editable=True)
-                    for q in circuit.line_labels:
-                        if q in subset:
-                            subsetcomplement_circuit.replace_with_idling_line(q)
+                    for q in subset:
+                        subsetcomplement_circuit.replace_with_idling_line(q)
                     subsetcomplement_circuit.done_editing()
-                    subsetcomplement = list(_copy.copy(structure))
-                    subsetcomplement_idealout = list(_copy.copy(idealout))
-                    del subsetcomplement[subset_ind]
-                    del subsetcomplement_idealout[subset_ind]
-                    subsetcomplement = tuple(subsetcomplement)
-                    subsetcomplement_idealout = tuple(subsetcomplement_idealout)
+                    subsetcomplement = subset_complements[subset_ind]
+                    subsetcomplement_idealout = idealout[:subset_ind] + idealout[subset_ind + 1:]
                     experiment_dict['circuits'][l, j][subsetcomplement] = subsetcomplement_circuit
                     experiment_dict['target'][l, j][subsetcomplement] = subsetcomplement_idealout
                     experiment_dict['settings'][l, j][subsetcomplement] = _get_setting(l, j, subsetcomplement, depths,
@@ -2092,7 +2169,7 @@ def pauli_layer_as_compiled_circuit(pspec, qubit_labels=None, keepidle=False):
 
     # Samples a random Pauli layer
     r = _np.random.randint(0, 4, size=n)
-    pauli_layer_std_lbls = [_lbl.Label(paulis[r[q]], (qubits[q],)) for q in range(n)]
+    pauli_layer_std_lbls = [_gate_label(paulis[r[q]], (qubits[q],)) for q in range(n)]
     # Converts the layer to a circuit, and changes to the native model.
     pauli_circuit = _cir.Circuit(layer_labels=pauli_layer_std_lbls, line_labels=qubits).parallelize()
     pauli_circuit = pauli_circuit.copy(editable=True)
@@ -2139,7 +2216,7 @@ def oneQclifford_layer_as_compiled_circuit(pspec, qubit_labels=None):
 
     r = _np.random.randint(0, 24, size=n)
 
-    oneQclifford_layer_std_lbls = [_lbl.Label(oneQcliffords[r[q]], (qubits[q],)) for q in range(n)]
+    oneQclifford_layer_std_lbls = [_gate_label(oneQcliffords[r[q]], (qubits[q],)) for q in range(n)]
     oneQclifford_circuit = _cir.Circuit(layer_labels=oneQclifford_layer_std_lbls, line_labels=qubits).parallelize()
     oneQclifford_circuit = oneQclifford_circuit.copy(editable=True)
     oneQclifford_circuit.change_gate_library(pspec.compilations['absolute'])
@@ -2516,8 +2593,6 @@ def random_germ(pspec, depths, interactingQs_density, qubit_labels):
 
     width = len(qubits)
 
-    germcircuit = _cir.Circuit(layer_labels=[], line_labels=qubits, editable=True)
-
 #     germlength = {}
 #     for q in qubits:
 #         glp = 0
@@ -2587,9 +2662,9 @@ def random_germ(pspec, depths, interactingQs_density, qubit_labels):
         subgerm[q] = [possibleops[_np.random.randint(0, len(possibleops))] for l in range(subgerm_depth[q])]
         repeated_subgerm[q] = (germ_depth // subgerm_depth[q]) * subgerm[q]
 
-    for l in range(germ_depth):
-        layer = [repeated_subgerm[q][l] for q in qubits]
-        germcircuit.insert_layer(layer, 0)
+    # Each layer is placed in front of the previous ones, so the circuit is built from the layers in reverse.
+    layers = [[repeated_subgerm[q][l] for q in qubits] for l in range(germ_depth)]
+    germcircuit = _cir.Circuit(layer_labels=layers[::-1], line_labels=qubits, editable=True)
 
     #tempgermcircuit = germcircuit.copy()
 
@@ -2604,21 +2679,27 @@ def random_germ(pspec, depths, interactingQs_density, qubit_labels):
         num2Qtoadd = int(_np.floor(germ_depth * width * interactingQs_density / 2))
         #print(num2Qtoadd)
 
+        # Give each qubit a bit, so that whether an edge contains an already selected qubit is a single AND.
+        qubit_bits = {q: 1 << i for i, q in enumerate(qubits)}
+        edgelist = [e for e in pspec.qubitgraph.edges() if e[0] in qubit_bits and e[1] in qubit_bits]
+        edgemasks = [qubit_bits[e[0]] | qubit_bits[e[1]] for e in edgelist]
+
         edgelistdict = {}
         for l in range(len(germcircuit)):
 
             # Prep the sampling variables.
-            edgelist = pspec.qubitgraph.edges()
-            edgelist = [e for e in edgelist if all([q in qubits for q in e])]
+            available = list(range(len(edgelist)))
+            usedmask = 0
             selectededges = []
 
             # Go through until all qubits have been assigned a gate.
-            while len(edgelist) > 0:
+            while len(available) > 0:
 
-                edge = edgelist[_np.random.randint(0, len(edgelist))]
-                selectededges.append(edge)
+                ind = available[_np.random.randint(0, len(available))]
+                selectededges.append(edgelist[ind])
                 # Delete all edges containing these qubits.
-                edgelist = [e for e in edgelist if not any([q in e for q in edge])]
+                usedmask |= edgemasks[ind]
+                available = [i for i in available if edgemasks[i] & usedmask == 0]
 
             edgelistdict[l] = selectededges
 
@@ -2679,17 +2760,13 @@ def random_germpower_circuits(pspec, depths, interactingQs_density, qubit_labels
     circs = []
     #germpowers = []
     for length in depths:
-        gdepth = 0
-        fullcircuit = _cir.Circuit(layer_labels=[], line_labels=qubits, editable=True)
         if not fixed_versus_depth:
             germcircuit = random_germ(pspec, depths, interactingQs_density, qubit_labels)
             germcircuits.append(germcircuit)
-        while len(fullcircuit) < length:
-            fullcircuit.append_circuit(germcircuit)
-            gdepth += 1
-
-        while len(fullcircuit) > length:
-            fullcircuit.delete_layers(len(fullcircuit) - 1)
+        # Repeat the germ until the circuit is at least `length` deep, and then truncate it to `length`.
+        gdepth = -(-length // len(germcircuit))
+        layers = (list(germcircuit) * gdepth)[:length]
+        fullcircuit = _cir.Circuit(layer_labels=layers, line_labels=qubits, editable=True)
 
         circs.append(fullcircuit)
         #germpowers.append(gdepth)
@@ -9,15 +9,14 @@
 #***************************************************************************************************
 
 import numpy as _np
-import copy as _copy
 import warnings as _warnings
-from itertools import cycle as _cycle
 from . import analysis as _analysis
 from . import dataset as _dataset
 from ...objects import oplessmodel as _oplessmodel
 from ...objects import dataset as _stdds
 from ...objects import multidataset as _multids
 from ...objects import datacomparator as _dcomp
+from ...tools import rbtools as _rbtools
 
 
 class Benchmarker(object):
@@ -75,10 +74,17 @@ class Benchmarker(object):
             self.success_key = None
             self
 
-        self.dscomparator = _copy.deepcopy(dscomparator)
+        # The DataComparator is only ever read from (or replaced) here, so there is no need to copy it.
+        self.dscomparator = dscomparator
 
         self._specs = tuple(specs.values())
         self._speckeys = tuple(specs.keys())
+        # Lookups used when processing each circuit, to avoid repeated list searches and get_structure() calls. The
+        # structures are stored as tuples, so that they are immutable snapshots that can't be changed via the specs.
+        self._speckey_indices = {speckey: i for i, speckey in enumerate(self._speckeys)}
+        self._spec_structures = tuple(tuple(tuple(qubits) for qubits in spec.get_structure()) for spec in self._specs)
+        self._spec_structure_sets = tuple(tuple(frozenset(qubits) for qubits in structure)
+                                          for structure in self._spec_structures)
 
         if summary_data is None:
             self.pass_summary_data = {}
@@ -90,7 +96,7 @@ class Benchmarker(object):
             self.global_summary_data = summary_data['global'].copy()
             self.aux = summary_data.get('aux', {}).copy()
             if self.multids is None:
-                arbqubits = self._specs[0].get_structure()[0]
+                arbqubits = self._spec_structures[0][0]
                 arbkey = list(self.pass_summary_data[0][arbqubits].keys())[0]
                 arbdepth = list(self.pass_summary_data[0][arbqubits][arbkey].keys())[0]
                 self.numpasses = len(self.pass_summary_data[0][arbqubits][arbkey][arbdepth])
@@ -197,12 +203,17 @@ class Benchmarker(object):
         return selected_regions
 
     def get_volumetric_benchmark_data(self, depths, widths='all', datatype='success_probabilities',
-                                      statistic='mean', specs=None, aggregate=True, rescaler='auto'):
+                                      statistic='mean', specs=None, aggregate=True, rescaler='auto', output='dict'):
 
         # maxmax : max over all depths/widths larger or equal
         # minmin : min over all deoths/widths smaller or equal.
 
+        # output : 'dict' returns the data as dicts keyed by depth and then width. 'array' returns it as
+        # (depths, widths)-shaped arrays (with a leading passes axis if not aggregating), with NaNs (or
+        # zero fail counts) where there is no data, and includes the 'depths' and 'widths' orderings.
+
         assert(statistic in ('max', 'mean', 'min', 'dist', 'maxmax', 'minmin'))
+        assert(output in ('dict', 'array'))
 
         if isinstance(widths, str):
             assert(widths == 'all')
@@ -210,7 +221,7 @@ class Benchmarker(object):
             assert(isinstance(widths, list) or isinstance(widths, tuple))
 
         if specs is None:  # If we're not given a filter, we use all of the data.
-            specs = {i: [qs for qs in spec.get_structure()] for i, spec in enumerate(self._specs)}
+            specs = {i: list(structure) for i, structure in enumerate(self._spec_structures)}
 
         width_to_spec = {}
         for i, structure in specs.items():
@@ -229,31 +240,35 @@ class Benchmarker(object):
         else:
             assert(set(widths) == set(list(width_to_spec.keys())))
 
+        # When the rescaling is the identity the data is used as is, rather than via a do-nothing function call.
+        identity_rescale = False
         if isinstance(rescaler, str):
-            if rescaler == 'auto':
-                if datatype == 'success_probabilities':
-                    def rescale_function(data, width):
-                        return list((_np.array(data) - 1 / 2**width) / (1 - 1 / 2**width))
-                else:
-                    def rescale_function(data, width):
-                        return data
-            elif rescaler == 'none':
-
+            if rescaler == 'auto' and datatype == 'success_probabilities':
                 def rescale_function(data, width):
-                    return data
-
+                    return (_np.asarray(data) - 1 / 2**width) / (1 - 1 / 2**width)
+            elif rescaler == 'auto' or rescaler == 'none':
+                identity_rescale = True
+                rescale_function = None
             else:
                 raise ValueError("Unknown rescaling option!")
 
         else:
+            # A user-specified rescaler must act elementwise, as it is applied to the data from all passes at once.
             rescale_function = rescaler
 
+        # The NaN-ignoring reduction used for the statistic (except for 'dist', where there isn't one).
+        nanreducer = {'max': _np.nanmax, 'maxmax': _np.nanmax, 'mean': _np.nanmean,
+                      'min': _np.nanmin, 'minmin': _np.nanmin}.get(statistic, None)
+        # The predictions don't contain NaNs, so are reduced with the standard functions.
+        predreducer = {'max': _np.max, 'maxmax': _np.max, 'mean': _np.mean,
+                       'min': _np.min, 'minmin': _np.min}.get(statistic, None)
+
         # if samecircuitpredictions:
         #     predvb = {d: {} for d in depths}
         # else:
         #     predvb = None
 
-        qs = self._specs[0].get_structure()[0]  # An arbitrary key
+        qs = self._spec_structures[0][0]  # An arbitrary key
         if datatype in self.pass_summary_data[0][qs].keys():
             datadict = self.pass_summary_data
             globaldata = False
@@ -270,20 +285,37 @@ class Benchmarker(object):
             vb = [{d: {} for d in depths} for i in range(self.numpasses)]
             fails = [{d: {} for d in depths} for i in range(self.numpasses)]
 
-        if len(self.predicted_summary_data) > 0:
-            arbkey = list(self.predicted_summary_data.keys())[0]
-            dopredictions = datatype in self.predicted_summary_data[arbkey][0][qs].keys()
-            if dopredictions:
-                pkeys = self.predicted_summary_data.keys()
-                predictedvb = {pkey: {d: {} for d in depths} for pkey in pkeys}
-            else:
-                predictedvb = {pkey: None for pkey in self.predicted_summary_data.keys()}
+        pkeys = tuple(self.predicted_summary_data.keys())
+        dopredictions = len(pkeys) > 0 and datatype in self.predicted_summary_data[pkeys[0]][0][qs].keys()
+        predictedvb = {pkey: {d: {} for d in depths} if dopredictions else None for pkey in pkeys}
 
         for w in widths:
             (i, qs) = width_to_spec[w]
             data = datadict[i][qs][datatype]
             if dopredictions:
+                # Repeat the process for the predictions, but with simpler code as don't have to deal with passes
+                # or NaNs. All the predictions are for the same circuits, so at each depth they are stacked into a
+                # (numpredictions, numcircuits) array. When there are the same number of circuits at every depth,
+                # these are also stacked, so that all the depths are rescaled and reduced together. As with the
+                # data, there are further axes when the data for each circuit is an array, and the statistics are
+                # over all of the axes after the predictions axis.
                 preddata = {pkey: self.predicted_summary_data[pkey][i][qs][datatype] for pkey in pkeys}
+                pdepths = [d for d in depths if d in data.keys()]
+                pdlines = [_np.array([preddata[pkey][d] for pkey in pkeys], float) for d in pdepths]
+                if len(set([pdline.shape for pdline in pdlines])) == 1:
+                    pdepthgroups = [(pdepths, _np.array(pdlines))]
+                else:
+                    pdepthgroups = [([d], pdline[None]) for d, pdline in zip(pdepths, pdlines)]
+
+                for pdepthgroup, pdarray in pdepthgroups:
+                    if not identity_rescale:
+                        pdarray = _np.asarray(rescale_function(pdarray, w), float)
+                    pvbarray = pdarray if predreducer is None else predreducer(pdarray,
+                                                                               axis=tuple(range(2, pdarray.ndim)))
+                    for d, pvbline in zip(pdepthgroup, pvbarray):
+                        for pkey, pvb in zip(pkeys, pvbline):
+                            predictedvb[pkey][d][w] = pvb
+
             for d in depths:
                 if d in data.keys():
 
@@ -294,79 +326,54 @@ class Benchmarker(object):
                         failcount = _np.sum(_np.isnan(dline))
                         fails[d][w] = (len(dline) - failcount, failcount)
 
+                        rescaled = dline if identity_rescale else rescale_function(dline, w)
                         if statistic == 'dist':
-                            vb[d][w] = rescale_function(dline, w)
+                            vb[d][w] = rescaled
                         else:
-                            if not _np.isnan(rescale_function(dline, w)).all():
-                                if statistic == 'max' or statistic == 'maxmax':
-                                    vb[d][w] = _np.nanmax(rescale_function(dline, w))
-                                elif statistic == 'mean':
-                                    vb[d][w] = _np.nanmean(rescale_function(dline, w))
-                                elif statistic == 'min' or statistic == 'minmin':
-                                    vb[d][w] = _np.nanmin(rescale_function(dline, w))
+                            rescaled = _np.asarray(rescaled, float)
+                            if not _np.isnan(rescaled).all():
+                                vb[d][w] = nanreducer(rescaled)
                             else:
                                 vb[d][w] = _np.nan
 
                     else:
-                        failline = [(len(dpass) - _np.sum(_np.isnan(dpass)), _np.sum(_np.isnan(dpass)))
-                                    for dpass in dline]
-
-                        if statistic == 'max' or statistic == 'maxmax':
-                            vbdataline = [_np.nanmax(rescale_function(dpass, w))
-                                          if not _np.isnan(rescale_function(dpass, w)).all() else _np.nan
-                                          for dpass in dline]
-                        elif statistic == 'mean':
-                            vbdataline = [_np.nanmean(rescale_function(dpass, w))
-                                          if not _np.isnan(rescale_function(dpass, w)).all() else _np.nan
-                                          for dpass in dline]
-                        elif statistic == 'min' or statistic == 'minmin':
-                            vbdataline = [_np.nanmin(rescale_function(dpass, w))
-                                          if not _np.isnan(rescale_function(dpass, w)).all() else _np.nan
-                                          for dpass in dline]
-                        elif statistic == 'dist':
-                            vbdataline = [rescale_function(dpass, w) for dpass in dline]
+                        # Stack the passes into a (numpasses, numcircuits) array, so that all of the per-pass
+                        # statistics can be computed with a single vectorized reduction. For some datatypes (e.g.,
+                        # 'hamming_distance_counts') the data for each circuit is itself an array, so there are
+                        # further axes, and the statistics are over all of the axes except the passes axis.
+                        dline = _np.asarray(dline, float)
+                        numpasses, numcircuits = dline.shape[:2]
+                        # The fails are counted per circuit, where a circuit has failed if all of its data is NaN.
+                        nancounts = _np.sum(_np.isnan(dline).reshape(numpasses, numcircuits, -1).all(axis=2), axis=1)
+                        successcounts = numcircuits - nancounts
+                        # The rescaling is applied to all the passes at once.
+                        rescaled = dline if identity_rescale else _np.asarray(rescale_function(dline, w), float)
+
+                        if statistic == 'dist':
+                            vbdataline = [list(dpass) for dpass in rescaled]
+                        else:
+                            rescaled = rescaled.reshape(numpasses, -1)
+                            allnan = _np.isnan(rescaled).all(axis=1)
+                            vbdataline = _np.full(numpasses, _np.nan)
+                            vbdataline[~allnan] = nanreducer(rescaled[~allnan], axis=1)
 
                         if not aggregate:
                             for i in range(len(vb)):
                                 vb[i][d][w] = vbdataline[i]
-                                fails[i][d][w] = failline[i]
+                                fails[i][d][w] = (successcounts[i], nancounts[i])
 
                         if aggregate:
 
-                            successcount = 0
-                            failcount = 0
-                            for (successcountpass, failcountpass) in failline:
-                                successcount += successcountpass
-                                failcount += failcountpass
-                                fails[d][w] = (successcount, failcount)
+                            fails[d][w] = (_np.sum(successcounts), _np.sum(nancounts))
 
                             if statistic == 'dist':
                                 vb[d][w] = [item for sublist in vbdataline for item in sublist]
                             else:
-                                if not _np.isnan(vbdataline).all():
-                                    if statistic == 'max' or statistic == 'maxmax':
-                                        vb[d][w] = _np.nanmax(vbdataline)
-                                    elif statistic == 'mean':
-                                        vb[d][w] = _np.nanmean(vbdataline)
-                                    elif statistic == 'min' or statistic == 'minmin':
-                                        vb[d][w] = _np.nanmin(vbdataline)
+                                if not allnan.all():
+                                    vb[d][w] = nanreducer(vbdataline)
                                 else:
                                     vb[d][w] = _np.nan
 
-                    # Repeat the process for the predictions, but with simpler code as don't have to
-                    # deal with passes or NaNs.
-                    if dopredictions:
-                        pdline = {pkey: preddata[pkey][d] for pkey in pkeys}
-                        for pkey in pkeys:
-                            if statistic == 'dist':
-                                predictedvb[pkey][d][w] = rescale_function(pdline[pkey], w)
-                            if statistic == 'max' or statistic == 'maxmax':
-                                predictedvb[pkey][d][w] = _np.max(rescale_function(pdline[pkey], w))
-                            if statistic == 'mean':
-                                predictedvb[pkey][d][w] = _np.mean(rescale_function(pdline[pkey], w))
-                            if statistic == 'min' or statistic == 'minmin':
-                                predictedvb[pkey][d][w] = _np.min(rescale_function(pdline[pkey], w))
-
         if statistic == 'minmin' or statistic == 'maxmax':
             if aggregate:
                 for d in vb.keys():
@@ -388,7 +395,38 @@ class Benchmarker(object):
                                     if statistic == 'maxmax' and d2 >= d and w2 >= w and vb[i][d2][w2] > vb[i][d][w]:
                                         vb[i][d][w] = vb[i][d2][w2]
 
-        out = {'data': vb, 'fails': fails, 'predictions': predictedvb}
+        if output == 'array':
+
+            def vbdict_to_array(vbdict):
+                vbarray = _np.full((len(depths), len(widths)), _np.nan, object if statistic == 'dist' else float)
+                for di, d in enumerate(depths):
+                    for wi, w in enumerate(widths):
+                        if w in vbdict[d]:
+                            vbarray[di, wi] = vbdict[d][w]
+                return vbarray
+
+            def failsdict_to_array(failsdict):
+                failsarray = _np.zeros((len(depths), len(widths), 2), int)
+                for di, d in enumerate(depths):
+                    for wi, w in enumerate(widths):
+                        if w in failsdict[d]:
+                            failsarray[di, wi, :] = failsdict[d][w]
+                return failsarray
+
+            if isinstance(vb, list):
+                vb = _np.array([vbdict_to_array(vbpass) for vbpass in vb])
+                fails = _np.array([failsdict_to_array(failspass) for failspass in fails])
+            else:
+                vb = vbdict_to_array(vb)
+                fails = failsdict_to_array(fails)
+            predictedvb = {pkey: vbdict_to_array(pvb) if pvb is not None else None
+                           for pkey, pvb in predictedvb.items()}
+
+            out = {'data': vb, 'fails': fails, 'predictions': predictedvb, 'depths': list(depths),
+                   'widths': list(widths)}
+
+        else:
+            out = {'data': vb, 'fails': fails, 'predictions': predictedvb}
 
         return out
 
@@ -399,7 +437,7 @@ class Benchmarker(object):
         if specs is None:
             specs = self.filter_experiments()
 
-        qubits = self._specs[0].get_structure()[0]  # An arbitrary key in the dict of the summary data.
+        qubits = self._spec_structures[0][0]  # An arbitrary key in the dict of the summary data.
         if aggregate:
             flattened_data = {dtype: [] for dtype in self.pass_summary_data[0][qubits].keys()}
         else:
@@ -416,23 +454,16 @@ class Benchmarker(object):
                     for depth, dataline in data.items():
                         #print(specind, qubits, dtype, depth)
                         if aggregate:
-                            aggregatedata = _np.array(dataline[0])
-                            # print(aggregatedata)
-                            # print(type(aggregatedata))
-                            # print(type(aggregatedata[0]))
-                            for i in range(1, self.numpasses):
-                                # print(dataline[i])
-                                # print(type(dataline[i]))
-                                # print(type(dataline[i][0]))
-                                aggregatedata = aggregatedata + _np.array(dataline[i])
-                            flattened_data[dtype] += list(aggregatedata)
+                            # Sums over the passes (the first axis) in a single reduction.
+                            aggregatedata = _np.sum(_np.asarray(dataline, float), axis=0)
+                            flattened_data[dtype].extend(aggregatedata.tolist())
                         else:
                             for i in range(self.numpasses):
-                                flattened_data[dtype][i] += dataline[i]
+                                flattened_data[dtype][i].extend(dataline[i])
 
                 for dtype, data in self.global_summary_data[specind][qubits].items():
                     for depth, dataline in data.items():
-                        flattened_data[dtype] += dataline
+                        flattened_data[dtype].extend(dataline)
                 for dtype, data in self.aux[specind][qubits].items():
                     for depth, dataline in data.items():
                         flattened_data[dtype] += dataline
@@ -440,12 +471,12 @@ class Benchmarker(object):
                     data = self.predicted_summary_data[pkey][specind][qubits]
                     if 'success_probabilities' in data.keys():
                         for depth, dataline in data['success_probabilities'].items():
-                            flattened_data['predictions'][pkey]['success_probabilities'] += dataline
+                            flattened_data['predictions'][pkey]['success_probabilities'].extend(dataline)
                     else:
                         for (depth, dataline1), dataline2 in zip(data['success_counts'].items(),
                                                                  data['total_counts'].values()):
-                            flattened_data['predictions'][pkey]['success_probabilities'] += list(
-                                _np.array(dataline1) / _np.array(dataline2))
+                            flattened_data['predictions'][pkey]['success_probabilities'].extend(
+                                (_np.asarray(dataline1, float) / _np.asarray(dataline2, float)).tolist())
 
         #  Only do this if we've not already stored the success probabilities in the benchamrker.
         if ('success_counts' in flattened_data) and ('total_counts' in flattened_data) \
@@ -490,15 +521,24 @@ class Benchmarker(object):
 
         sfmultids = _multids.MultiDataSet()
 
+        def get_success_counts(dsrow):
+            try:
+                return dsrow[dsrow.aux[self.success_key]]
+            except:
+                return 0
+
+        sfoutcomes = [('success',), ('fail',)]
+
         for ds_ind, ds in self.multids['standard'].items():
             sfds = _stdds.DataSet(outcomeLabels=['success', 'fail'], collisionAction=ds.collisionAction)
-            for circ, dsrow in ds.items(stripOccurrenceTags=True):
-                try:
-                    scounts = dsrow[dsrow.aux[self.success_key]]
-                except:
-                    scounts = 0
-                tcounts = dsrow.total
-                sfds.add_count_dict(circ, {'success': scounts, 'fail': tcounts - scounts}, aux=dsrow.aux)
+            rows = list(ds.items(stripOccurrenceTags=True))
+            # Compute all the fail counts with a single array subtraction.
+            scounts = _np.array([get_success_counts(dsrow) for circ, dsrow in rows], float)
+            tcounts = _np.array([dsrow.total for circ, dsrow in rows], float)
+            fcounts = tcounts - scounts
+            # Add the raw data directly, as there is no need to build and sort an outcome dict for every circuit.
+            for (circ, dsrow), sc, fc in zip(rows, scounts, fcounts):
+                sfds.add_raw_series_data(circ, sfoutcomes, [0, 0], [sc, fc], aux=dsrow.aux, unsafe=True)
 
             sfds.done_adding_data()
             sfmultids.add_dataset(ds_ind, sfds)
@@ -511,8 +551,7 @@ class Benchmarker(object):
 
     def get_summary_data(self, datatype, specindex, qubits=None):
 
-        spec = self._specs[specindex]
-        structure = spec.get_structure()
+        structure = self._spec_structures[specindex]
         if len(structure) == 1:
             if qubits is None:
                 qubits = structure[0]
@@ -550,6 +589,10 @@ class Benchmarker(object):
             else:
                 assert(isinstance(predictions[pkey], _oplessmodel.SuccessFailModel)
                        ), "If not a DataSet must be an ErrorRatesModel!"
+        predmodels = {pkey: predmodel for pkey, predmodel in predictions.items() if pkey != preddskey}
+        # The (trimmed) circuits to make model predictions for, and where to store each prediction. The predictions
+        # are computed together after all the data has been processed, and each distinct circuit is computed once.
+        predcircuits = {}
 
         datatypes = ['success_counts', 'total_counts', 'hamming_distance_counts', 'success_probabilities']
         if self.dscomparator is not None:
@@ -560,26 +603,82 @@ class Benchmarker(object):
         #preddtypes = ('success_probabilities', )
         auxtypes = ['twoQgate_count', 'depth', 'target', 'width', 'circuit_index'] + auxtypes
 
-        def get_datatype(datatype, dsrow, circ, target, qubits):
-
-            if datatype == 'success_counts':
-                return _analysis.marginalized_success_counts(dsrow, circ, target, qubits)
-            elif datatype == 'total_counts':
-                return dsrow.total
-            elif datatype == 'hamming_distance_counts':
-                return _analysis.marginalized_hamming_distance_counts(dsrow, circ, target, qubits)
-            elif datatype == 'success_probabilities':
-                sc = _analysis.marginalized_success_counts(dsrow, circ, target, qubits)
-                tc = dsrow.total
-                if tc == 0:
-                    return _np.nan
-                else:
-                    return sc / tc
-            else:
-                raise ValueError("Unknown data type!")
+        def get_outcomes(dsrow):
+            # The outcomes of a row as an array, so that they can be marginalized onto each qubit subset in turn.
+            return _rbtools.outcome_bits_and_counts(dsrow) if dsrow.total > 0 else None
+
+        def get_datatypes(dsrow, circ, target, qubits, marginalization, outcomes):
+            # Computes all the `datatypes`, in that order, from a single marginalization of the counts.
+            sc, hdc = _rbtools.marginalized_success_and_hamming_distance_counts(dsrow, circ, target, qubits,
+                                                                                marginalization, outcomes)
+            tc = dsrow.total
+            sp = _np.nan if tc == 0 else sc / tc
+            return sc, tc, hdc, sp
 
         numpasses = len(self.multids[useds].keys())
 
+        # Count the circuits at each depth for each spec, so that the per-pass summary data can be stored in
+        # preallocated (numpasses, numcircuits) arrays rather than grown list-by-list.
+        # The aux info of each circuit is also extracted here, once, and then used for every pass.
+        numcircuits_at = {}
+        circuitinfo = []
+        for auxdict in self.multids[useds].auxInfo.values():
+            speckeys = auxdict['spec']
+            depth = auxdict['depth'] if 'depth' in auxdict else auxdict['length']
+            if isinstance(speckeys, str):
+                speckeys = [speckeys]
+            specinds = [self._speckey_indices[speckey] for speckey in speckeys]
+            circuitinfo.append((specinds, depth, auxdict['target'], auxdict))
+            for speckey in speckeys:
+                numcircuits_at[speckey, depth] = numcircuits_at.get((speckey, depth), 0) + 1
+
+        # Create all the dictionaries and arrays that store the summary data up front, in the order that the specs
+        # and depths are first encountered in the DataSet, so that the circuit loop only has to fill them in.
+        for (speckey, depth), numcircuits_at_depth in numcircuits_at.items():
+            specind = self._speckey_indices[speckey]
+            structure = self._spec_structures[specind]
+
+            if specind not in summarydata:
+                summarydata[specind] = {qubits: {datatype: {} for datatype in datatypes} for qubits in structure}
+                aux[specind] = {qubits: {auxtype: {} for auxtype in auxtypes} for qubits in structure}
+                for pkey in predictions.keys():
+                    if pkey == preddskey:
+                        predsummarydata[pkey][specind] = {qubits: {datatype: {} for datatype in datatypes}
+                                                          for qubits in structure}
+                    else:
+                        predsummarydata[pkey][specind] = {qubits: {'success_probabilities': {}} for qubits in structure}
+                globalsummarydata[specind] = {qubits: {datatype: {} for datatype in stabdatatypes}
+                                              for qubits in structure}
+
+            # All the aux data except the width is the same for every qubit subset of a circuit, so the qubit subsets
+            # share the same lists (which are filled in once per circuit). This aux data must not be modified.
+            sharedaux = {auxtype: [] for auxtype in auxtypes if auxtype != 'width'}
+            for qubits in structure:
+                for datatype in datatypes:
+                    shape = (numpasses, numcircuits_at_depth)
+                    if datatype == 'hamming_distance_counts':
+                        shape += (len(qubits) + 1,)
+                    summarydata[specind][qubits][datatype][depth] = _np.zeros(shape, float)
+                for auxtype in auxtypes:
+                    aux[specind][qubits][auxtype][depth] = [] if auxtype == 'width' else sharedaux[auxtype]
+
+                # The predicted and global data is the same shape as the data from a single pass.
+                for pkey in predictions.keys():
+                    if pkey == preddskey:
+                        for datatype in datatypes:
+                            predsummarydata[pkey][specind][qubits][datatype][depth] = _np.zeros(
+                                summarydata[specind][qubits][datatype][depth].shape[1:], float)
+                    else:
+                        predsummarydata[pkey][specind][qubits]['success_probabilities'][depth] = _np.zeros(
+                            numcircuits_at_depth, float)
+
+                for datatype in stabdatatypes:
+                    globalsummarydata[specind][qubits][datatype][depth] = _np.zeros(numcircuits_at_depth, float)
+
+        # The marginalization of each circuit onto each of its qubit subsets depends only on the circuit, so it is
+        # computed on the first pass and reused for all of the other passes.
+        marginalizations = {}
+
         for ds_ind in self.multids[useds].keys():
 
             if verbosity > 0:
@@ -587,136 +686,107 @@ class Benchmarker(object):
                                                                                         len(self.multids[useds])))
 
             #circuits = {}
-            numcircuits = len(self.multids[useds][ds_ind].keys())
+            numcircuits = len(self.multids[useds][ds_ind])
             percent = 0
+            # The index of the circuit at which the next percentage is printed.
+            nextprint = 0
+            # The index at which to store the data from the next circuit at each (specind, depth) for this pass.
+            circuit_index = {}
+
+            # Only do predictions on the first pass dataset.
+            usepredds = preddskey is not None and ds_ind == 0
+            if usepredds:
+                # The predicted data is looked up by circuit, so it doesn't matter if the predicted DataSet is
+                # ordered differently to the main DataSet. Duplicate circuits (in a 'keepseparate' DataSet) are
+                # matched up in the order they appear.
+                preddsrows = {}
+                for pcirc, pdsrow in predds.items(stripOccurrenceTags=True):
+                    preddsrows.setdefault(pcirc, []).append(pdsrow)
+
+            iterator = zip(self.multids[useds][ds_ind].items(stripOccurrenceTags=True), circuitinfo)
+
+            for i, ((circ, dsrow), (specinds, depth, target, auxdict)) in enumerate(iterator):
+
+                outcomes = get_outcomes(dsrow)
+                if usepredds:
+                    pdsrow = preddsrows[circ].pop(0)
+                    predoutcomes = get_outcomes(pdsrow)
+
+                if verbosity > 0 and i >= nextprint:
+                    percent += 1
+                    nextprint = -(-percent * numcircuits // 100)
+                    if percent in (1, 26, 51, 76):
+                        print("\n    {},".format(percent), end='')
+                    else:
+                        print("{},".format(percent), end='')
+                    if percent == 100:
+                        print('')
+
+                # These are the same for every spec and qubit subset of the circuit, so they're only computed once.
+                # They're only needed for the aux data and predictions, which only use the first pass.
+                if ds_ind == 0:
+                    circ_twoQgate_count = circ.twoQgate_count()
+                    circ_depth = circ.depth()
+                    if len(predmodels) > 0:
+                        circ_lines = frozenset(circ.line_labels)
+
+                for specind in specinds:
+                    structure = self._spec_structures[specind]
+
+                    circind = circuit_index.get((specind, depth), 0)
+                    circuit_index[specind, depth] = circind + 1
+
+                    # Only record aux on the first pass dataset. The width is recorded for each qubit subset below, and
+                    # the rest of the aux data is recorded once, in the lists shared by all the qubit subsets.
+                    if ds_ind == 0:
+                        for auxtype in auxtypes:
+                            if auxtype == 'width':
+                                continue
+                            elif auxtype == 'twoQgate_count':
+                                auxdata = circ_twoQgate_count
+                            elif auxtype == 'depth':
+                                auxdata = circ_depth
+                            elif auxtype == 'target':
+                                auxdata = target
+                            elif auxtype == 'circuit_index':
+                                auxdata = i
+                            else:
+                                auxdata = auxdict.get(auxtype, None)
 
-            if preddskey is None or ds_ind > 0:
-                iterator = zip(self.multids[useds][ds_ind].items(stripOccurrenceTags=True),
-                               self.multids[useds].auxInfo.values(), _cycle(zip([None, ], [None, ])))
-            else:
-                iterator = zip(self.multids[useds][ds_ind].items(stripOccurrenceTags=True),
-                               self.multids[useds].auxInfo.values(),
-                               predds.items(stripOccurrenceTags=True))
-
-            for i, ((circ, dsrow), auxdict, (pcirc, pdsrow)) in enumerate(iterator):
-
-                if pcirc is not None:
-                    if not circ == pcirc:
-                        print('-{}-'.format(i))
-                        pdsrow = predds[circ]
-                        _warnings.warn("Predicted DataSet is ordered differently to the main DataSet!"
-                                       + "Reverting to potentially slow dictionary hashing!")
+                            aux[specind][structure[0]][auxtype][depth].append(auxdata)
 
-                if verbosity > 0:
-                    if _np.floor(100 * i / numcircuits) >= percent:
-                        percent += 1
-                        if percent in (1, 26, 51, 76):
-                            print("\n    {},".format(percent), end='')
+                    for qubits_ind, qubits in enumerate(structure):
+                        # The marginalization is the same for the data and the predicted data, and for every pass.
+                        if ds_ind == 0:
+                            marginalization = _rbtools.marginalization_indices(circ, target, qubits)
+                            marginalizations[i, specind, qubits_ind] = marginalization
                         else:
-                            print("{},".format(percent), end='')
-                        if percent == 100:
-                            print('')
-
-                speckeys = auxdict['spec']
-                try:
-                    depth = auxdict['depth']
-                except:
-                    depth = auxdict['length']
-                target = auxdict['target']
-
-                if isinstance(speckeys, str):
-                    speckeys = [speckeys]
-
-                for speckey in speckeys:
-                    specind = self._speckeys.index(speckey)
-                    spec = self._specs[specind]
-                    structure = spec.get_structure()
-
-                    # If we've not yet encountered this specind, we create the required dictionaries to store the
-                    # summary data from the circuits associated with that spec.
-                    if specind not in summarydata.keys():
-
-                        assert(ds_ind == 0)
-                        summarydata[specind] = {qubits: {datatype: {}
-                                                         for datatype in datatypes} for qubits in structure}
-                        aux[specind] = {qubits: {auxtype: {} for auxtype in auxtypes} for qubits in structure}
-
+                            marginalization = marginalizations[i, specind, qubits_ind]
+                        for datatype, x in zip(datatypes, get_datatypes(dsrow, circ, target, qubits,
+                                                                        marginalization, outcomes)):
+                            summarydata[specind][qubits][datatype][depth][ds_ind, circind] = x
                         # Only do predictions on the first pass dataset.
-                        for pkey in predictions.keys():
-                            predsummarydata[pkey][specind] = {}
-                            for pkey in predictions.keys():
-                                if pkey == preddskey:
-                                    predsummarydata[pkey][specind] = {qubits: {datatype: {} for datatype in datatypes}
-                                                                      for qubits in structure}
-                                else:
-                                    predsummarydata[pkey][specind] = {
-                                        qubits: {'success_probabilities': {}} for qubits in structure}
-
-                        globalsummarydata[specind] = {qubits: {datatype: {}
-                                                               for datatype in stabdatatypes} for qubits in structure}
-
-                    # If we've not yet encountered this depth, we create the list where the data for that depth
-                    # is stored.
-                    for qubits in structure:
-                        if depth not in summarydata[specind][qubits][datatypes[0]].keys():
-
-                            assert(ds_ind == 0)
-                            for datatype in datatypes:
-                                summarydata[specind][qubits][datatype][depth] = [[] for i in range(numpasses)]
-                            for auxtype in auxtypes:
-                                aux[specind][qubits][auxtype][depth] = []
-
-                            for pkey in predictions.keys():
-                                if pkey == preddskey:
-                                    for datatype in datatypes:
-                                        predsummarydata[pkey][specind][qubits][datatype][depth] = []
-                                else:
-                                    predsummarydata[pkey][specind][qubits]['success_probabilities'][depth] = []
-
-                            for datatype in stabdatatypes:
-                                globalsummarydata[specind][qubits][datatype][depth] = []
-
-                    #print('---', i)
-                    for qubits_ind, qubits in enumerate(structure):
-                        for datatype in datatypes:
-                            x = get_datatype(datatype, dsrow, circ, target, qubits)
-                            summarydata[specind][qubits][datatype][depth][ds_ind].append(x)
-                            # Only do predictions on the first pass dataset.
-                            if preddskey is not None and ds_ind == 0:
-                                x = get_datatype(datatype, pdsrow, circ, target, qubits)
-                                predsummarydata[preddskey][specind][qubits][datatype][depth].append(x)
+                        if usepredds:
+                            for datatype, x in zip(datatypes, get_datatypes(pdsrow, circ, target, qubits,
+                                                                            marginalization, predoutcomes)):
+                                predsummarydata[preddskey][specind][qubits][datatype][depth][circind] = x
 
                         # Only do predictions and aux on the first pass dataset.
                         if ds_ind == 0:
-                            for auxtype in auxtypes:
-                                if auxtype == 'twoQgate_count':
-                                    auxdata = circ.twoQgate_count()
-                                elif auxtype == 'depth':
-                                    auxdata = circ.depth()
-                                elif auxtype == 'target':
-                                    auxdata = target
-                                elif auxtype == 'circuit_index':
-                                    auxdata = i
-                                elif auxtype == 'width':
-                                    auxdata = len(qubits)
+                            aux[specind][qubits]['width'][depth].append(len(qubits))
+
+                            if len(predmodels) > 0:
+                                # The circuit is trimmed to `qubits` once, and used for all the model predictions.
+                                qubits_set = self._spec_structure_sets[specind][qubits_ind]
+                                if circ_lines != qubits_set:
+                                    # All the other lines are deleted in one call, so the layers are only walked once.
+                                    trimmedcirc = circ.copy(editable=True)
+                                    trimmedcirc.delete_lines([q for q in circ.line_labels if q not in qubits_set])
+                                    trimmedcirc.done_editing()
                                 else:
-                                    auxdata = auxdict.get(auxtype, None)
+                                    trimmedcirc = circ
 
-                                aux[specind][qubits][auxtype][depth].append(auxdata)
-
-                            for pkey, predmodel in predictions.items():
-                                if pkey != preddskey:
-                                    if set(circ.line_labels) != set(qubits):
-                                        trimmedcirc = circ.copy(editable=True)
-                                        for q in circ.line_labels:
-                                            if q not in qubits:
-                                                trimmedcirc.delete_lines(q)
-                                    else:
-                                        trimmedcirc = circ
-
-                                    predsp = predmodel.probs(trimmedcirc)[('success',)]
-                                    predsummarydata[pkey][specind][qubits]['success_probabilities'][depth].append(
-                                        predsp)
+                                predcircuits.setdefault(trimmedcirc, []).append((specind, qubits, depth, circind))
 
                             for datatype in stabdatatypes:
                                 if datatype == 'tvds':
@@ -727,11 +797,20 @@ class Benchmarker(object):
                                     x = self.dscomparator.jsds.get(circ, _np.nan)
                                 elif datatype == 'llrs':
                                     x = self.dscomparator.llrs.get(circ, _np.nan)
-                                globalsummarydata[specind][qubits][datatype][depth].append(x)
+                                globalsummarydata[specind][qubits][datatype][depth][circind] = x
 
             if verbosity > 0:
                 print('')
 
+        if len(predcircuits) > 0:
+            predcircuitlist = list(predcircuits.keys())
+            for pkey, predmodel in predmodels.items():
+                predprobs = predmodel.bulk_probs(predcircuitlist)
+                for trimmedcirc, locations in predcircuits.items():
+                    predsp = predprobs[trimmedcirc][('success',)]
+                    for specind, qubits, depth, circind in locations:
+                        predsummarydata[pkey][specind][qubits]['success_probabilities'][depth][circind] = predsp
+
         #  Record the data in the object at the end.
         self.predicted_summary_data = predsummarydata
         self.pass_summary_data = summarydata
@@ -773,17 +852,26 @@ class Benchmarker(object):
 
         """
 
+        containset = frozenset(containqubits) if containqubits is not None else None
+        onset = frozenset(onqubits) if onqubits is not None else None
+
         kept = {}
         for i, spec in enumerate(self._specs):
-            structures = spec.get_structure()
-            for qubits in structures:
 
-                keep = True
+            # The filters that depend only on the spec are applied once, before looking at its qubit subsets.
+            if benchmarktype is not None:
+                if spec.type != benchmarktype:
+                    continue
 
-                if keep:
-                    if benchmarktype is not None:
-                        if spec.type != benchmarktype:
-                            keep = False
+            if sampler is not None:
+                if not spec._sampler == sampler:
+                    continue
+
+            # Whether the spec's two-qubit gate rate matches `twoQgateprob`, found the first time it's needed.
+            twoQgateprob_matches = None
+            for qubits, qubits_set in zip(self._spec_structures[i], self._spec_structure_sets[i]):
+
+                keep = True
 
                 if keep:
                     if numqubits is not None:
@@ -792,22 +880,21 @@ class Benchmarker(object):
 
                 if keep:
                     if containqubits is not None:
-                        if not set(containqubits).issubset(qubits):
+                        if not containset <= qubits_set:
                             keep = False
 
                 if keep:
                     if onqubits is not None:
-                        if set(qubits) != set(onqubits):
-                            keep = False
-
-                if keep:
-                    if sampler is not None:
-                        if not spec._sampler == sampler:
+                        if qubits_set != onset:
                             keep = False
 
                 if keep:
                     if twoQgateprob is not None:
-                        if not _np.allclose(twoQgateprob, spec.get_twoQgate_rate()):
+                        if twoQgateprob_matches is None:
+                            # The same tolerances as _np.allclose, which is slow for comparing two scalars.
+                            twoQgaterate = spec.get_twoQgate_rate()
+                            twoQgateprob_matches = abs(twoQgateprob - twoQgaterate) <= 1e-8 + 1e-5 * abs(twoQgaterate)
+                        if not twoQgateprob_matches:
                             keep = False
 
                 if keep:
@@ -816,22 +903,10 @@ class Benchmarker(object):
                     kept[i].append(qubits)
 
         if prefilter is not None:
-            dellist = []
-            for key in kept.keys():
-                if key not in prefilter.keys():
-                    dellist.append(key)
-                else:
-                    newlist = []
-                    for qubits in kept[key]:
-                        if qubits in prefilter[key]:
-                            newlist.append(qubits)
-                    if len(newlist) == 0:
-                        dellist.append(key)
-                    else:
-                        kept[key] = newlist
-
-            for key in dellist:
-                del kept[key]
+            # Only keep the qubits that are also in the prefilter, and drop any specs with no qubits left.
+            prefiltersets = {key: set(prefilter[key]) for key in kept.keys() if key in prefilter}
+            kept = {key: [qubits for qubits in kept[key] if qubits in prefiltersets[key]] for key in prefiltersets}
+            kept = {key: qubitslist for key, qubitslist in kept.items() if len(qubitslist) > 0}
 
         return kept
 
@@ -23,24 +23,16 @@ def create_summary_datasets(ds, spec, datatype='adjusted', verbosity=1):
     lengths = list(circuits.keys())
     lengths.sort()
 
-    success_counts = {}
-    total_counts = {}
-    hamming_distance_counts = {}
+    # Only the data needed for `datatype` is computed and stored: success and total counts for the raw success
+    # probabilities, and Hamming distance counts for the adjusted success probabilities.
+    if datatype == 'raw':
+        metrics = ('success_counts', 'total_counts')
+    elif datatype == 'adjusted':
+        metrics = ('hamming_distance_counts',)
+    else:
+        raise ValueError("Requested data type ` {} ` not understood!".format(datatype))
 
-    for qubits in structure:
-
-        if datatype == 'raw':
-            success_counts[qubits] = {}
-            total_counts[qubits] = {}
-            hamming_distance_counts[qubits] = None
-
-        elif datatype == 'adjusted':
-            success_counts[qubits] = None
-            total_counts[qubits] = None
-            hamming_distance_counts[qubits] = {}
-
-        else:
-            raise ValueError("Requested data type ` {} ` not understood!".format(datatype))
+    data = {qubits: {metric: {} for metric in metrics} for qubits in structure}
 
     if verbosity == 1:
         tab = ' '
@@ -53,30 +45,23 @@ def create_summary_datasets(ds, spec, datatype='adjusted', verbosity=1):
             print(tab + "- Processing length {} of {}".format(mit + 1, len(circuits)))
 
         for qubits in structure:
-            if datatype == 'raw':
-                success_counts[qubits][m] = []
-                total_counts[qubits][m] = []
-            elif datatype == 'adjusted':
-                hamming_distance_counts[qubits][m] = []
+            for metric in metrics:
+                data[qubits][metric][m] = []
 
         for (circ, target) in circuitlist:
             dsrow = ds[circ]
             for qubits in structure:
                 if datatype == 'raw':
-                    success_counts[qubits][m].append(_analysis.marginalized_success_counts(dsrow, circ, target, qubits))
-                    total_counts[qubits][m].append(dsrow.total)
-                elif datatype == 'adjusted':
-                    hamming_distance_counts[qubits][m].append(
+                    data[qubits]['success_counts'][m].append(
+                        _analysis.marginalized_success_counts(dsrow, circ, target, qubits))
+                    data[qubits]['total_counts'][m].append(dsrow.total)
+                else:
+                    data[qubits]['hamming_distance_counts'][m].append(
                         _analysis.marginalized_hamming_distance_counts(dsrow, circ, target, qubits))
 
     summary_data = {}
     for qubits in structure:
-        #print(success_counts[qubits])
-        #print(total_counts[qubits])
-        #print(hamming_distance_counts[qubits])
-        summary_data[qubits] = RBSummaryDataset(len(qubits), success_counts=success_counts[qubits],
-                                                total_counts=total_counts[qubits],
-                                                hamming_distance_counts=hamming_distance_counts[qubits])
+        summary_data[qubits] = RBSummaryDataset(len(qubits), **data[qubits])
 
     return summary_data
 
@@ -89,6 +74,9 @@ class RBSummaryDataset(object):
     store all the details about the circuits and the counts for each circuit (use a standard DataSet object to store
     the entire output of RB experiments).
     """
+    # Many of these objects can be created (e.g., one per bootstrap sample), so they don't have a per-instance __dict__.
+    __slots__ = ('number_of_qubits', 'finitecounts', 'aux', 'descriptor', 'datatype', 'counts', '_total_counts',
+                 'lengths', 'SPs', 'ASPs', 'adjusted_SPs', 'adjusted_ASPs', 'bootstraps')
 
     def __init__(self, number_of_qubits, success_counts=None, total_counts=None, hamming_distance_counts=None,
                  aux={}, finitecounts=True, descriptor=''):
@@ -106,6 +106,12 @@ def load_benchmarker(directory, load_datasets=True, verbosity=1):
     return benchmarker
 
 
+def _summary_data_as_lists(summarydata):
+    # The summary data is stored in arrays, which must be converted to lists for json.
+    return {dtype: {depth: _np.asarray(dataline).tolist() for depth, dataline in data.items()}
+            for dtype, data in summarydata.items()}
+
+
 def write_benchmarker(benchmarker, outdir, overwrite=False, verbosity=0):
 
     try:
@@ -163,8 +169,8 @@ def write_benchmarker(benchmarker, outdir, overwrite=False, verbosity=0):
         write_benchmarkspec(spec, outdir + '/specs/{}.txt'.format(i), warning=0)
 
         for j, qubits in enumerate(structure):
-            summarydict = {'pass': benchmarker.pass_summary_data[i][qubits],
-                           'global': benchmarker.global_summary_data[i][qubits]
+            summarydict = {'pass': _summary_data_as_lists(benchmarker.pass_summary_data[i][qubits]),
+                           'global': _summary_data_as_lists(benchmarker.global_summary_data[i][qubits])
                            }
             fname = outdir + '/summarydata/' + '{}-{}.txt'.format(i, j)
             with open(fname, 'w') as f:
@@ -176,7 +182,7 @@ def write_benchmarker(benchmarker, outdir, overwrite=False, verbosity=0):
                 _json.dump(aux, f, indent=4)
 
             for pkey in benchmarker.predicted_summary_data.keys():
-                summarydict = benchmarker.predicted_summary_data[pkey][i][qubits]
+                summarydict = _summary_data_as_lists(benchmarker.predicted_summary_data[pkey][i][qubits])
                 fname = outdir + '/predictions/{}/summarydata/'.format(pkey) + '{}-{}.txt'.format(i, j)
                 with open(fname, 'w') as f:
                     _json.dump(summarydict, f, indent=4)
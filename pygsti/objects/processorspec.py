@@ -158,6 +158,9 @@ class ProcessorSpec(object):
         self.oneQgate_relations = {}
         # A dict from a gatename to the gatename of the inverse gate, if it is in the model.
         self.gate_inverse = {}
+        # Caches the primitive operation labels of each model split up by the number of qubits they act on (see
+        # get_gate_partition).
+        self._gate_partitions = {}
 
         # Add initial models
         for model_name in construct_models:
@@ -259,6 +262,61 @@ class ProcessorSpec(object):
 
         return edgelist
 
+    def get_gate_partition(self, model_name='clifford'):
+        """
+        Returns the primitive operation labels of a model split up by the number of qubits they
+        act on. This is computed once and cached, as the random circuit layer samplers need it for
+        every layer they sample. The cache is rebuilt if the model's primitive operation labels
+        change.
+
+        Parameters
+        ----------
+        model_name : str, optional
+            Which of the `models` to take the operation labels from.
+
+        Returns
+        -------
+        dict
+            A dictionary with the keys:
+
+            - '1Q_names' and '2Q_names': tuples of the distinct names of the 1-qubit and 2-qubit
+              gates, in the order they first appear in the model.
+            - '1Q_labels' and '2Q_labels': tuples of the 1-qubit and 2-qubit operation labels.
+            - '1Q_by_qubit' and '2Q_by_qubit': dicts from a qubit label to a tuple of the 1-qubit
+              or 2-qubit operation labels that act on that qubit.
+
+            This is shared between calls, so it should not be altered.
+        """
+        if not hasattr(self, '_gate_partitions'): self._gate_partitions = {}  # e.g., unpickled from an older version
+        oplabels = self.models[model_name].get_primitive_op_labels()
+        cached = self._gate_partitions.get(model_name, None)
+        if cached is not None and (cached[0] is oplabels or cached[0] == oplabels):
+            return cached[1]
+
+        # Sort the labels by the number of qubits they act on in a single pass.
+        oneQlabels = []
+        twoQlabels = []
+        oneQ_by_qubit = _collections.defaultdict(list)
+        twoQ_by_qubit = _collections.defaultdict(list)
+        for lbl in oplabels:
+            nqubits = lbl.number_of_qubits
+            if nqubits == 1:
+                oneQlabels.append(lbl)
+                oneQ_by_qubit[lbl.qubits[0]].append(lbl)
+            elif nqubits == 2:
+                twoQlabels.append(lbl)
+                twoQ_by_qubit[lbl.qubits[0]].append(lbl)
+                twoQ_by_qubit[lbl.qubits[1]].append(lbl)
+
+        partition = {'1Q_names': tuple(_collections.OrderedDict.fromkeys([lbl.name for lbl in oneQlabels])),
+                     '2Q_names': tuple(_collections.OrderedDict.fromkeys([lbl.name for lbl in twoQlabels])),
+                     '1Q_labels': tuple(oneQlabels),
+                     '2Q_labels': tuple(twoQlabels),
+                     '1Q_by_qubit': {q: tuple(lbls) for q, lbls in oneQ_by_qubit.items()},
+                     '2Q_by_qubit': {q: tuple(lbls) for q, lbls in twoQ_by_qubit.items()}}
+        self._gate_partitions[model_name] = (oplabels, partition)
+        return partition
+
     def get_std_model(self, model_name, parameterization='auto', sim_type='auto'):
         # Erik future : improve docstring.
         """
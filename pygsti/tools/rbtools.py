@@ -161,6 +161,119 @@ def marginalized_hamming_distance_counts(dsrow, circ, target, qubits):
     return hamming_distance_counts
 
 
+def marginalization_indices(circ, target, qubits):
+    """
+    The positions in the outcome bit strings of `circ` that correspond to `qubits`, paired
+    with the target outcome at each of those positions.
+
+    This is independent of the data, so it can be computed once and then used to marginalize
+    many data set rows for the same circuit, e.g., the data from multiple passes.
+
+    Parameters
+    ----------
+    circ : Circuit
+        The circuit, used to map `qubits` to positions in the outcome bit strings.
+
+    target : str
+        The target (ideal) outcome bit string of the circuit.
+
+    qubits : tuple
+        The qubits to marginalize onto.
+
+    Returns
+    -------
+    list
+        A list of (index, target bit) tuples, in the order of `qubits`.
+    """
+    # The rows of the circuit that we are interested in
+    indices = [circ.line_labels.index(q) for q in qubits]
+    # The ordering of this must be the same as what we compare it to.
+    return [(i, target[i]) for i in indices]
+
+
+def outcome_bits_and_counts(dsrow):
+    """
+    The outcome bit strings of a data set row, as a 2D array with one row per outcome, along
+    with the counts for each outcome.
+
+    This is independent of the qubits being marginalized onto, so it can be computed once
+    and then used to marginalize the row onto many different sets of qubits.
+
+    Parameters
+    ----------
+    dsrow : DataSetRow
+        The data for the circuit. The outcome labels must be bit strings of equal length.
+
+    Returns
+    -------
+    bits : numpy.ndarray
+        A (number of outcomes, number of bits) array containing the characters of the outcome
+        bit strings, as uint8 character codes.
+
+    counts : numpy.ndarray
+        The counts for each outcome, in the order of the rows of `bits`.
+    """
+    counts = dsrow.counts
+    bitstrings = [outcome[0] for outcome in counts.keys()]
+    bits = _np.frombuffer(''.join(bitstrings).encode(), _np.uint8).reshape(len(bitstrings), -1)
+    return bits, _np.fromiter(counts.values(), float, len(bitstrings))
+
+
+def marginalized_success_and_hamming_distance_counts(dsrow, circ, target, qubits, marginalization=None,
+                                                     outcomes=None):
+    """
+    Computes both the marginalized success counts and the marginalized Hamming distance
+    counts of a data set row, in a single vectorized pass over its outcomes.
+
+    Parameters
+    ----------
+    dsrow : DataSetRow
+        The data for the circuit.
+
+    circ : Circuit
+        The circuit, used to map `qubits` to positions in the outcome bit strings.
+
+    target : str
+        The target (ideal) outcome bit string of the circuit.
+
+    qubits : tuple
+        The qubits to marginalize onto.
+
+    marginalization : list, optional
+        The output of :function:`marginalization_indices` for `circ`, `target` and `qubits`,
+        if it has already been computed.
+
+    outcomes : tuple, optional
+        The output of :function:`outcome_bits_and_counts` for `dsrow`, if it has already been
+        computed.
+
+    Returns
+    -------
+    success_counts : float
+        The number of counts for which the outcome on `qubits` matches the target.
+
+    hamming_distance_counts : list
+        The number of counts at each Hamming distance, from 0 to len(`qubits`), from the
+        target outcome on `qubits`.
+    """
+    if dsrow.total == 0:
+        return 0, [0 for i in range(len(qubits) + 1)]
+
+    if marginalization is None:
+        marginalization = marginalization_indices(circ, target, qubits)
+    if outcomes is None:
+        outcomes = outcome_bits_and_counts(dsrow)
+
+    bits, counts = outcomes
+    indices = [i for i, t in marginalization]
+    targetbits = _np.frombuffer(''.join([t for i, t in marginalization]).encode(), _np.uint8)
+    hamming_distances = _np.count_nonzero(bits[:, indices] != targetbits, axis=1)
+    hamming_distance_counts = _np.bincount(hamming_distances, weights=counts, minlength=len(qubits) + 1)
+
+    # The success counts are the counts at a Hamming distance of zero from the target.
+    return hamming_distance_counts[0], list(hamming_distance_counts)
+
+
 def rescaling_factor(lengths, quantity, offset=2):
     """
     Finds a rescaling value alpha that can be used to map the Clifford RB decay constant
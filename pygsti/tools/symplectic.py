@@ -690,8 +690,63 @@ def pauli_z_measurement(state_s, state_p, qubit_index):
     #print("Nothing anticommutes!") #DEBUG
 
     # no break ==> all commute, so outcome is deterministic, so no
-    # state update; just determine whether Z_a or -Z_a is in the stabilizer,
-    # which we do using the "anti-stabilizer" cleverness of PRA 70, 052328
+    # state update; just determine whether Z_a or -Z_a is in the stabilizer
+    if _deterministic_pauli_z_outcome(state_s, state_p, a) == 0:  # outcome is always zero
+        #print("Always 0!") #DEBUG
+        return (1.0, 0.0, state_s, state_s, state_p, state_p)
+    else:  # outcome is always 1
+        #print("Always 1!") #DEBUG
+        return (0.0, 1.0, state_s, state_s, state_p, state_p)
+
+
+def pauli_z_measurement_probs(state_s, state_p, qubit_indices):
+    """
+    Computes the probabilities of the 1 (-) outcome from measuring a
+    Pauli Z operator on each of several qubits of a stabilizer state.
+
+    These are the `p1` values that :function:`pauli_z_measurement` returns
+    for each qubit, but the post-measurement states are not computed, and
+    which outcomes are random is found for all the qubits at once.
+
+    Parameters
+    ----------
+    state_s : numpy array
+        The matrix over the integers mod 2 representing the stabilizer state
+
+    state_p : numpy array
+        The 'phase vector' over the integers mod 4 representing the stabilizer state
+
+    qubit_indices : iterable
+        The indices of the qubits being measured.
+
+    Returns
+    -------
+    numpy array
+        The probability of the 1 outcome for each qubit in `qubit_indices`.
+    """
+    two_n = len(state_p); n = two_n // 2
+    assert(_np.shape(state_s) == (two_n, two_n)), "Inconsistent stabilizier representation!"
+
+    qubit_indices = _np.array(list(qubit_indices), int)
+    # The outcome is random for every qubit that has a 1-bit in the first n columns of its row of state_s
+    # (see pauli_z_measurement), and otherwise it is deterministic.
+    probs = 0.5 * _np.ones(len(qubit_indices), float)
+    deterministic = _np.flatnonzero(_np.logical_not(_np.any(state_s[qubit_indices, 0:n] == 1, axis=1)))
+    for k in deterministic:
+        probs[k] = float(_deterministic_pauli_z_outcome(state_s, state_p, qubit_indices[k]))
+
+    return probs
+
+
+def _deterministic_pauli_z_outcome(state_s, state_p, qubit_index):
+    """
+    The outcome (0 or 1) of measuring Pauli Z on a qubit of a stabilizer
+    state, when all of the stabilizers commute with this Pauli Z. This
+    determines whether Z_a or -Z_a is in the stabilizer, using the
+    "anti-stabilizer" cleverness of PRA 70, 052328.
+    """
+    two_n = len(state_p); n = two_n // 2
+    a = qubit_index
     acc_s = _np.zeros(two_n, int); acc_p = _np.zeros(1, int)
     for i in range(n, two_n):  # loop over anti-stabilizer
         if state_s[a, i] == 1:  # for elements that anti-commute w/Z_a
@@ -699,13 +754,8 @@ def pauli_z_measurement(state_s, state_p, qubit_index):
     # now the high bit of acc_p holds the outcome
     icount = acc_p[0] + sum([3 if (acc_s[i] == acc_s[i + n] == 1) else 0 for i in range(n)])  # 11 = -iY convention
     icount = icount % 4
-    if icount == 0:  # outcome is always zero
-        #print("Always 0!") #DEBUG
-        return (1.0, 0.0, state_s, state_s, state_p, state_p)
-    else:  # outcome is always 1
-        #print("Always 1!") #DEBUG
-        assert(icount == 2)  # should never get 1 or 3 (low bit should always be 0)
-        return (0.0, 1.0, state_s, state_s, state_p, state_p)
+    assert(icount in (0, 2))  # should never get 1 or 3 (low bit should always be 0)
+    return icount // 2
 
 
 def colsum(i, j, s, p, n):
@@ -0,0 +1,170 @@
+import numpy as np
+
+from ..util import BaseCase
+
+from pygsti.objects import ProcessorSpec, Label
+from pygsti.algorithms import randomcircuit as rc
+
+
+class RandomCircuitLayerTester(BaseCase):
+    @classmethod
+    def setUpClass(cls):
+        super(RandomCircuitLayerTester, cls).setUpClass()
+        cls.qubit_labels = ['Q0', 'Q1', 'Q2', 'Q3']
+        cls.pspec = ProcessorSpec(4, ['Gxpi2', 'Gypi2', 'Gcnot'], verbosity=0, qubit_labels=cls.qubit_labels)
+
+    def setUp(self):
+        np.random.seed(2020)
+
+    def assertIsCompleteLayer(self, layer, qubits):
+        # Every qubit should be acted on by exactly one gate in the layer.
+        layer_qubits = [q for gate in layer for q in gate.qubits]
+        self.assertEqual(sorted(layer_qubits), sorted(qubits))
+
+    def test_find_all_sets_of_compatible_twoQgates(self):
+        edgelist = [('Q0', 'Q1'), ('Q1', 'Q2'), ('Q2', 'Q3'), ('Q3', 'Q0')]
+        self.assertEqual(rc.find_all_sets_of_compatible_twoQgates(edgelist, 1),
+                         [['Gcnot:Q0:Q1'], ['Gcnot:Q1:Q2'], ['Gcnot:Q2:Q3'], ['Gcnot:Q3:Q0']])
+        self.assertEqual(rc.find_all_sets_of_compatible_twoQgates(edgelist, 2),
+                         [['Gcnot:Q0:Q1', 'Gcnot:Q2:Q3'], ['Gcnot:Q1:Q2', 'Gcnot:Q3:Q0']])
+        self.assertEqual(rc.find_all_sets_of_compatible_twoQgates(edgelist, 3), [])
+
+        co2Qgates = rc.find_all_sets_of_compatible_twoQgates(edgelist, 2, gatename='Gcphase', aslabel=True)
+        self.assertEqual(co2Qgates[0], [Label('Gcphase', ('Q0', 'Q1')), Label('Gcphase', ('Q2', 'Q3'))])
+
+    def test_circuit_layer_by_pairing_qubits(self):
+        for qubits in [None, ['Q0', 'Q2', 'Q3'], ['Q1']]:
+            expected_qubits = self.qubit_labels if qubits is None else qubits
+            n = len(expected_qubits)
+            for _ in range(10):
+                layer = rc.circuit_layer_by_pairing_qubits(self.pspec, qubits, twoQprob=0.5)
+                self.assertIsCompleteLayer(layer, expected_qubits)
+
+            layer = rc.circuit_layer_by_pairing_qubits(self.pspec, qubits, twoQprob=0.)
+            self.assertEqual(len(layer), n)
+            layer = rc.circuit_layer_by_pairing_qubits(self.pspec, qubits, twoQprob=1.)
+            self.assertEqual(len(layer), n - n // 2)
+            self.assertEqual(sum([gate.name == 'Gcnot' for gate in layer]), n // 2)
+
+        layer = rc.circuit_layer_by_pairing_qubits(self.pspec, twoQprob=0., oneQgatenames=['Gxpi2'])
+        self.assertTrue(all([gate.name == 'Gxpi2' for gate in layer]))
+
+    def test_circuit_layer_by_edgegrab(self):
+        for _ in range(10):
+            layer = rc.circuit_layer_by_edgegrab(self.pspec, None, 1)
+            self.assertIsCompleteLayer(layer, self.qubit_labels)
+            layer = rc.circuit_layer_by_edgegrab(self.pspec, ['Q0', 'Q2', 'Q3'], 1)
+            self.assertIsCompleteLayer(layer, ['Q0', 'Q2', 'Q3'])
+
+        # With all-to-all connectivity two disjoint edges are always found, so this always gives two CNOTs.
+        layer = rc.circuit_layer_by_edgegrab(self.pspec, None, 2)
+        self.assertEqual(len(layer), 2)
+
+    def test_circuit_layer_by_co2Qgates(self):
+        co2Qgates = rc.find_all_sets_of_compatible_twoQgates(self.pspec.qubitgraph.edges(), 2, aslabel=True)
+        co2Qgates = [[]] + co2Qgates
+        for _ in range(10):
+            layer = rc.circuit_layer_by_co2Qgates(self.pspec, None, co2Qgates, co2Qgatesprob=[1, 2, 1, 1, 1])
+            self.assertIsCompleteLayer(layer, self.qubit_labels)
+
+        layer = rc.circuit_layer_by_co2Qgates(self.pspec, None, co2Qgates, co2Qgatesprob=[0, 1, 0, 0, 0])
+        self.assertEqual(layer[:2], co2Qgates[1])
+
+        layer = rc.circuit_layer_by_co2Qgates(self.pspec, None, co2Qgates, co2Qgatesprob=[1, 0, 0, 0, 0],
+                                              oneQgatenames=['Gxpi2'])
+        self.assertEqual(len(layer), 4)
+        self.assertTrue(all([gate.name == 'Gxpi2' for gate in layer]))
+
+    def test_circuit_layer_of_oneQgates(self):
+        layer = rc.circuit_layer_of_oneQgates(self.pspec)
+        self.assertIsCompleteLayer(layer, self.qubit_labels)
+        self.assertTrue(all([gate.name in ('Gxpi2', 'Gypi2') for gate in layer]))
+
+        layer = rc.circuit_layer_of_oneQgates(self.pspec, ['Q1', 'Q3'], oneQgatenames=['Gxpi2', 'Gypi2'],
+                                              pdist=[0, 2])
+        self.assertEqual(layer, [Label('Gypi2', 'Q1'), Label('Gypi2', 'Q3')])
+
+        with self.assertRaises(ValueError):
+            rc.circuit_layer_of_oneQgates(self.pspec, ['Q4'])
+
+    def test_circuit_layer_of_oneQgates_pdist_frequencies(self):
+        # The empirical gate frequencies should match the (unnormalized) distribution pdist.
+        names = ['Gxpi2', 'Gypi2', 'Gzpi2', 'Gi']
+        pdist = [4, 2, 0, 2]
+        counts = dict([(name, 0) for name in names])
+        for _ in range(500):
+            for gate in rc.circuit_layer_of_oneQgates(self.pspec, oneQgatenames=names, pdist=pdist):
+                counts[gate.name] += 1
+        freqs = np.array([counts[name] for name in names]) / 2000.
+        self.assertArraysAlmostEqual(freqs, np.array(pdist) / 8., places=1)
+        self.assertEqual(counts['Gzpi2'], 0)
+
+    def test_random_circuit(self):
+        for sampler, samplerargs in [('Qelimination', []), ('pairingQs', []), ('edgegrab', [1]), ('local', [])]:
+            circuit = rc.random_circuit(self.pspec, 5, sampler=sampler, samplerargs=samplerargs)
+            self.assertEqual(circuit.depth(), 5)
+            for i in range(5):
+                self.assertIsCompleteLayer(circuit.get_layer(i), self.qubit_labels)
+
+    def test_circuit_layer_by_Qelimination(self):
+        for qubits in [None, ['Q0', 'Q2', 'Q3'], ['Q1']]:
+            expected_qubits = self.qubit_labels if qubits is None else qubits
+            for twoQprob in [0.5, None]:
+                for _ in range(10):
+                    layer = rc.circuit_layer_by_Qelimination(self.pspec, qubits, twoQprob=twoQprob)
+                    self.assertIsCompleteLayer(layer, expected_qubits)
+
+        layer = rc.circuit_layer_by_Qelimination(self.pspec, twoQprob=0.)
+        self.assertEqual(len(layer), 4)
+        layer = rc.circuit_layer_by_Qelimination(self.pspec, twoQprob=1.)
+        self.assertEqual(len(layer), 2)
+
+    def test_randState_reproducibility(self):
+        co2Qgates = [[]] + rc.find_all_sets_of_compatible_twoQgates(self.pspec.qubitgraph.edges(), 2, aslabel=True)
+        samplers = [(rc.circuit_layer_by_pairing_qubits, []), (rc.circuit_layer_by_Qelimination, []),
+                    (rc.circuit_layer_by_edgegrab, [1]), (rc.circuit_layer_by_co2Qgates, [co2Qgates]),
+                    (rc.circuit_layer_of_oneQgates, [])]
+        for sampler, samplerargs in samplers:
+            layers1 = [sampler(self.pspec, None, *samplerargs, randState=np.random.RandomState(7)) for _ in range(3)]
+            layers2 = [sampler(self.pspec, None, *samplerargs, randState=np.random.RandomState(7)) for _ in range(3)]
+            self.assertEqual(layers1, layers2)
+
+        circuit1 = rc.random_circuit(self.pspec, 10, addlocal=True, randState=np.random.RandomState(7))
+        circuit2 = rc.random_circuit(self.pspec, 10, addlocal=True, randState=np.random.RandomState(7))
+        self.assertEqual(circuit1, circuit2)
+
+        np.random.seed(7)
+        circuit3 = rc.random_circuit(self.pspec, 10, addlocal=True)
+        self.assertEqual(circuit1, circuit3)  # RandomState(7) gives the same stream as numpy.random.seed(7)
+
+    def test_simultaneous_random_circuits_experiment_seed(self):
+        structure = (('Q0', 'Q1'), ('Q2',), ('Q3',))
+        expdicts = [rc.simultaneous_random_circuits_experiment(self.pspec, [0, 2], 2, structure=structure,
+                                                               setcomplement_isolated=True, verbosity=0, seed=11)
+                    for _ in range(2)]
+        self.assertEqual(expdicts[0]['circuits'], expdicts[1]['circuits'])
+        self.assertEqual(expdicts[0]['probs'], expdicts[1]['probs'])
+        self.assertEqual(expdicts[0]['settings'], expdicts[1]['settings'])
+
+    def test_exhaustive_independent_random_circuits_experiment(self):
+        structure = (('Q0', 'Q1'), ('Q2',), ('Q3',))
+        expdict = rc.exhaustive_independent_random_circuits_experiment(self.pspec, [1, 3], 2, structure=structure,
+                                                                       verbosity=0)
+        self.assertEqual(len(expdict['circuits']), 8)
+        for setting_comb, circuit in expdict['circuits'].items():
+            self.assertEqual(circuit.line_labels, ('Q0', 'Q1', 'Q2', 'Q3'))
+            subset_circuits = [expdict['subset_circuits'][qubit_labels][i]
+                               for qubit_labels, i in zip(structure, setting_comb)]
+            self.assertEqual(circuit.depth(), max([c.depth() for c in subset_circuits]))
+            for subset_circuit in subset_circuits:
+                for i in range(subset_circuit.depth()):
+                    self.assertTrue(set(subset_circuit.get_layer(i)).issubset(circuit.get_layer(i)))
+
+    def test_direct_rb_circuit_compile_cache(self):
+        cache = {}
+        for _ in range(10):
+            circuit, idealout = rc.direct_rb_circuit(self.pspec, 2, qubit_labels=['Q0'], randomizeout=True,
+                                                     citerations=2, compile_cache=cache)
+            self.assertEqual(circuit.line_labels, ('Q0',))
+        # There are 24 single-qubit Cliffords, each of which is compiled at most once as a prep and as a measurement.
+        self.assertTrue(0 < len(cache) <= 48)
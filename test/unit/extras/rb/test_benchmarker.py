@@ -0,0 +1,139 @@
+import numpy as np
+import unittest
+
+from ...util import BaseCase
+
+from pygsti.objects import Circuit, DataSet, MultiDataSet
+
+try:
+    from pygsti.extras.rb import benchmarker
+    _BENCHMARKER_LOADED = True
+except ImportError:
+    _BENCHMARKER_LOADED = False
+
+
+class SpecStub(object):
+    # The benchmarker only needs the structure of each spec.
+    def __init__(self, structure):
+        self.structure = structure
+
+    def get_structure(self):
+        return self.structure
+
+
+@unittest.skipUnless(_BENCHMARKER_LOADED, "`pygsti.extras.rb` can't be imported")
+class BenchmarkerTester(BaseCase):
+    def setUp(self):
+        self.specs = {'w1': SpecStub((('Q0',),)), 'w2': SpecStub((('Q0', 'Q1'),)),
+                      'w3': SpecStub((('Q0', 'Q1', 'Q2'),))}
+        self.depths = [0, 2]
+        # 2 passes of 3 circuits at each depth.
+        rng = np.random.RandomState(0)
+        self.hdcounts = {}
+        passdata = {}
+        for i, spec in enumerate(self.specs.values()):
+            qubits = spec.get_structure()[0]
+            self.hdcounts[len(qubits)] = {d: rng.randint(0, 10, size=(2, 3, len(qubits) + 1)).astype(float)
+                                          for d in self.depths}
+            successcounts = {d: self.hdcounts[len(qubits)][d][:, :, 0] for d in self.depths}
+            passdata[i] = {qubits: {'hamming_distance_counts': self.hdcounts[len(qubits)],
+                                    'success_counts': successcounts}}
+        globaldata = {i: {spec.get_structure()[0]: {}} for i, spec in enumerate(self.specs.values())}
+        self.bench = benchmarker.Benchmarker(self.specs, summary_data={'pass': passdata, 'global': globaldata})
+
+    def test_volumetric_benchmark_data_hamming_distance_counts(self):
+        # The data for each circuit is an array, so the statistics are over all of the data from each pass.
+        for statistic, reducer in [('mean', np.mean), ('max', np.max)]:
+            vbdata = self.bench.get_volumetric_benchmark_data(self.depths, datatype='hamming_distance_counts',
+                                                              statistic=statistic, aggregate=False)
+            for d in self.depths:
+                for w in (1, 2, 3):
+                    for i in range(2):
+                        self.assertAlmostEqual(vbdata['data'][i][d][w], reducer(self.hdcounts[w][d][i]))
+                        self.assertEqual(vbdata['fails'][i][d][w], (3, 0))
+
+            vbdata = self.bench.get_volumetric_benchmark_data(self.depths, datatype='hamming_distance_counts',
+                                                              statistic=statistic, aggregate=True)
+            for d in self.depths:
+                for w in (1, 2, 3):
+                    expected = reducer([reducer(self.hdcounts[w][d][i]) for i in range(2)])
+                    self.assertAlmostEqual(vbdata['data'][d][w], expected)
+                    self.assertEqual(vbdata['fails'][d][w], (6, 0))
+
+        for aggregate in (False, True):
+            vbdata = self.bench.get_volumetric_benchmark_data(self.depths, datatype='hamming_distance_counts',
+                                                              statistic='dist', aggregate=aggregate)
+            fails = vbdata['fails'] if aggregate else vbdata['fails'][0]
+            self.assertEqual(fails[0][3], (6, 0) if aggregate else (3, 0))
+
+    def test_volumetric_benchmark_data_hamming_distance_counts_predictions(self):
+        # Predicted Hamming distance counts (e.g., from a predicted DataSet) have no passes axis.
+        predicted = {i: {qubits: {'hamming_distance_counts': {d: self.hdcounts[len(qubits)][d][1] for d in self.depths}}
+                         for qubits in spec.get_structure()} for i, spec in enumerate(self.specs.values())}
+        self.bench.predicted_summary_data = {'model': predicted}
+        for statistic, reducer in [('mean', np.mean), ('min', np.min)]:
+            vbdata = self.bench.get_volumetric_benchmark_data(self.depths, datatype='hamming_distance_counts',
+                                                              statistic=statistic)
+            for d in self.depths:
+                for w in (1, 2, 3):
+                    self.assertAlmostEqual(vbdata['predictions']['model'][d][w], reducer(self.hdcounts[w][d][1]))
+
+    def test_volumetric_benchmark_data_fails(self):
+        # A circuit with no counts has a NaN success probability, and is counted as a fail.
+        self.bench.pass_summary_data[0][('Q0',)]['success_probabilities'] = {0: np.array([[0.5, np.nan, 1.],
+                                                                                          [np.nan, np.nan, 1.]])}
+        vbdata = self.bench.get_volumetric_benchmark_data([0], widths=[1], specs={0: [('Q0',)]}, rescaler='none',
+                                                          aggregate=False)
+        self.assertEqual([vbdata['fails'][i][0][1] for i in range(2)], [(2, 1), (1, 2)])
+        self.assertEqual([vbdata['data'][i][0][1] for i in range(2)], [0.75, 1.])
+        vbdata = self.bench.get_volumetric_benchmark_data([0], widths=[1], specs={0: [('Q0',)]}, rescaler='none')
+        self.assertEqual(vbdata['fails'][0][1], (3, 3))
+
+    def test_create_summary_data(self):
+        lines = ('Q0', 'Q1', 'Q2')
+        rng = np.random.RandomState(1)
+        outcomes = [format(i, '03b') for i in range(8)]
+        passes = [DataSet(outcomeLabels=outcomes) for i in range(2)]
+        expected = {}
+        for i, (speckey, spec) in enumerate(self.specs.items()):
+            qubits = spec.get_structure()[0]
+            indices = [lines.index(q) for q in qubits]
+            for d in self.depths:
+                hdcounts = np.zeros((2, 3, len(qubits) + 1))
+                for j in range(3):
+                    circuit = Circuit([('Gx' + speckey, lines[j])] + [('Gy', 'Q0')] * d, line_labels=lines)
+                    target = ''.join(rng.choice(['0', '1'], size=3))
+                    aux = {'spec': speckey, 'depth': d, 'target': target}
+                    for k, ds in enumerate(passes):
+                        counts = dict(zip(outcomes, rng.randint(0, 10, size=8)))
+                        ds.add_count_dict(circuit, counts, aux=aux)
+                        for outcome, count in counts.items():
+                            hdcounts[k, j, sum([outcome[ind] != target[ind] for ind in indices])] += count
+                expected[i, d] = hdcounts
+        multids = MultiDataSet()
+        for k, ds in enumerate(passes):
+            ds.done_adding_data()
+            multids.add_dataset(k, ds)
+
+        bench = benchmarker.Benchmarker(self.specs, ds=multids)
+        bench.create_summary_data(verbosity=0)
+        for i, spec in enumerate(self.specs.values()):
+            qubits = spec.get_structure()[0]
+            for d in self.depths:
+                data = bench.pass_summary_data[i][qubits]
+                self.assertArraysAlmostEqual(data['hamming_distance_counts'][d], expected[i, d])
+                self.assertArraysAlmostEqual(data['success_counts'][d], expected[i, d][:, :, 0])
+                self.assertArraysAlmostEqual(data['total_counts'][d], np.sum(expected[i, d], axis=2))
+                self.assertArraysAlmostEqual(data['success_probabilities'][d],
+                                             expected[i, d][:, :, 0] / np.sum(expected[i, d], axis=2))
+                self.assertEqual(bench.aux[i][qubits]['width'][d], [len(qubits)] * 3)
+                self.assertEqual(bench.aux[i][qubits]['depth'][d], [d + 1] * 3)
+
+        vbdata = bench.get_volumetric_benchmark_data(self.depths, datatype='success_probabilities',
+                                                     statistic='mean', rescaler='none', aggregate=False)
+        for i, spec in enumerate(self.specs.values()):
+            w = len(spec.get_structure()[0])
+            for d in self.depths:
+                for k in range(2):
+                    self.assertAlmostEqual(vbdata['data'][k][d][w],
+                                           np.mean(expected[i, d][k, :, 0] / np.sum(expected[i, d][k], axis=1)))
@@ -29,3 +29,15 @@ class ProcessorSpecTester(BaseCase):
         p2 = ps.models['clifford'].probs(c2)
         self.assertAlmostEqual(p2['00'], 0.5)
         self.assertAlmostEqual(p2['01'], 0.5)
+
+    def test_get_gate_partition(self):
+        ps = ProcessorSpec(3, ('Gxpi2', 'Gypi2', 'Gcnot'), verbosity=0)
+        partition = ps.get_gate_partition('clifford')
+        self.assertEqual(partition['1Q_names'], ('Gxpi2', 'Gypi2'))
+        self.assertEqual(partition['2Q_names'], ('Gcnot',))
+        self.assertEqual(len(partition['1Q_labels']), 6)
+        self.assertEqual(len(partition['2Q_labels']), 4)  # CNOTs in both directions on a line
+        self.assertEqual(set(partition['1Q_by_qubit'][1]), set(ps.clifford_ops_on_qubits[(1,)]))
+        self.assertTrue(all([1 in lbl.qubits for lbl in partition['2Q_by_qubit'][1]]))
+        self.assertEqual(len(partition['2Q_by_qubit'][1]), 4)
+        self.assertIs(ps.get_gate_partition('clifford'), partition)
@@ -0,0 +1,30 @@
+from ..util import BaseCase
+
+import pygsti
+from pygsti.objects import Circuit
+import pygsti.tools.rbtools as rbt
+
+
+class RBToolsTester(BaseCase):
+    def setUp(self):
+        self.circ = Circuit([[('Gxpi', 'Q0'), ('Gxpi', 'Q2')]], line_labels=('Q0', 'Q1', 'Q2'))
+        ds = pygsti.objects.DataSet(outcomeLabels=['000', '001', '101', '111'])
+        ds.add_count_dict(self.circ, {'000': 10, '001': 20, '101': 30, '111': 40})
+        ds.done_adding_data()
+        self.dsrow = ds[self.circ]
+        self.target = '101'
+
+    def test_marginalization_indices(self):
+        self.assertEqual(rbt.marginalization_indices(self.circ, self.target, ('Q2', 'Q1')), [(2, '1'), (1, '0')])
+
+    def test_marginalized_success_and_hamming_distance_counts(self):
+        for qubits in [('Q0', 'Q1', 'Q2'), ('Q0', 'Q2'), ('Q1',)]:
+            sc, hdc = rbt.marginalized_success_and_hamming_distance_counts(self.dsrow, self.circ, self.target, qubits)
+            self.assertEqual(sc, rbt.marginalized_success_counts(self.dsrow, self.circ, self.target, qubits))
+            self.assertEqual(hdc, rbt.marginalized_hamming_distance_counts(self.dsrow, self.circ, self.target, qubits))
+
+        outcomes = rbt.outcome_bits_and_counts(self.dsrow)
+        sc, hdc = rbt.marginalized_success_and_hamming_distance_counts(self.dsrow, self.circ, self.target,
+                                                                       ('Q0', 'Q2'), outcomes=outcomes)
+        self.assertEqual(sc, 70)
+        self.assertEqual(hdc, [70, 20, 10])
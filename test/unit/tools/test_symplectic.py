@@ -84,6 +84,23 @@ class SymplecticBase(object):
         pvalid = symplectic.construct_valid_phase_vector(s, pseed)
         self.assertTrue(symplectic.check_valid_clifford(s, pvalid))
 
+    def test_pauli_z_measurement_probs(self):
+        # Check the batched probabilities agree with measuring each qubit separately, for a state with
+        # deterministic outcomes and for random stabilizer states (which typically have random outcomes).
+        zvals = [i % 2 for i in range(self.n)]
+        states = [symplectic.prep_stabilizer_state(self.n, zvals=zvals)]
+        for i in range(3):
+            s, p = symplectic.random_clifford(self.n)
+            state_s, state_p = symplectic.prep_stabilizer_state(self.n)
+            states.append(symplectic.apply_clifford_to_stabilizer_state(s, p, state_s, state_p))
+
+        for state_s, state_p in states:
+            probs = symplectic.pauli_z_measurement_probs(state_s, state_p, range(self.n))
+            expected = [symplectic.pauli_z_measurement(state_s, state_p, q)[1] for q in range(self.n)]
+            self.assertArraysEqual(probs, np.array(expected))
+        probs = symplectic.pauli_z_measurement_probs(states[0][0], states[0][1], range(self.n))
+        self.assertEqual(sorted(probs), sorted(zvals))
+
     def test_internal_gate_symplectic_representations(self):
         # Basic tests of the symp. rep. dictionary
         srep_dict = symplectic.get_internal_gate_symplectic_representations()